@@ -0,0 +1,31 @@
+import argparse
+import json
+import sys
+
+from benchmarks.suite import run_suite
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Times the engine hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='sides of the square maps')
+    parser.add_argument('--dragons', type=int, default=10, help='dragons per map')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated maps')
+    parser.add_argument('--output', help='JSON file for the results, stdout by default')
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.dragons, args.repeat, args.seed)
+
+    for result in report['results']:
+        print(f"{result['bench']:>10} {result['size']:>5}x{result['size']:<5} {result['min'] * 1000:10.3f} ms",
+              file=sys.stderr)
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
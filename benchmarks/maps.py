@@ -0,0 +1,34 @@
+import random
+from typing import Optional
+
+from src.engine import Room
+
+
+__all__ = [
+    'random_map',
+    'write_map'
+]
+
+
+def random_map(width: int, height: int, dragons: int, seed: Optional[int] = None) -> str:
+    """
+    Returns the text of a valid map with random rooms, a knight and dragons on distinct rooms
+    """
+    rnd = random.Random(seed)
+    symbols = list(Room.char_map.keys())
+    lines = [''.join(rnd.choices(symbols, k=width)) for _ in range(height)]
+
+    cells = rnd.sample(range(width * height), dragons + 1)
+    lines.append(f'A {cells[0] % width} {cells[0] // width}')
+    for cell in cells[1:]:
+        lines.append(f'D {cell % width} {cell // width} {rnd.randint(1, dragons)}')
+
+    return '\n'.join(lines)
+
+
+def write_map(filename: str, width: int, height: int, dragons: int, seed: Optional[int] = None) -> None:
+    """
+    Writes a random map to the given file
+    """
+    with open(filename, 'w') as f:
+        f.write(random_map(width, height, dragons, seed))
@@ -0,0 +1,109 @@
+import os
+import platform
+import random
+import tempfile
+from time import perf_counter
+from typing import Callable, Dict, List, Sequence
+
+from benchmarks.maps import write_map
+from src.engine import Dungeon
+from src.game import Game
+from src.generator import maze
+from src.headless import play
+from src.libs import fltk as tk
+from src.utils import State
+from src import vector
+
+
+__all__ = [
+    'measure',
+    'run_suite'
+]
+
+
+def measure(func: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Returns the durations in seconds of repeated calls of the function
+    """
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def _game(filename: str) -> Game:
+    State.proxy['map'] = filename
+    game = Game()
+    # Tiles are Tk images, which need a window: the commands keep a name per door mask instead
+    game.atlas.tiles = {mask: f'tile{mask}' for mask in range(16)}
+    return game
+
+
+def _render(game: Game) -> int:
+    # First draw of the game, which draws every room, rendered to a list of canvas commands
+    game.drawn = bytearray(len(game.dungeon.grid))
+    game.sprites = {}
+    game.path_version = -1
+    commands = []
+    tk.debut_trame(commands)
+    try:
+        game._draw()
+    finally:
+        tk.fin_trame()
+    return len(commands)
+
+
+def run_suite(sizes: Sequence[int], dragons: int, repeat: int, seed: int = 0) -> Dict:
+    """
+    Times the engine hot paths on square random maps of the given sizes
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f'map{size}.txt')
+            write_map(filename, size, size, dragons, seed)
+            dungeon = Dungeon.from_file(filename)
+            game = _game(filename)
+
+            benches = {
+                'parse': lambda: Dungeon.from_file(filename),
+                'bfs': dungeon.bfs,
+                'neighbors': lambda: [room.neighbors for room in dungeon.rooms],
+                'simulate': lambda: play(Dungeon.from_file(filename)),
+                'render': lambda: _render(game),
+            }
+            if vector.NUMPY_AVAILABLE:
+                links = vector.adjacency(vector.array(dungeon))
+                start = dungeon.player.y * dungeon.width + dungeon.player.x
+                # Random rooms make small areas: a perfect maze has one area, with long corridors
+                labyrinth = Dungeon()
+                labyrinth.width = labyrinth.height = size
+                labyrinth.grid = maze(size, size, random.Random(seed))
+                maze_links = vector.adjacency(vector.array(labyrinth))
+                benches.update({
+                    'np-links': lambda: vector.adjacency(vector.array(dungeon)),
+                    'np-comps': lambda: vector.components(links),
+                    'np-dist': lambda: vector.distances(links, start),
+                    'np-maze': lambda: vector.distances(maze_links, 0),
+                })
+            for name, func in benches.items():
+                timings = measure(func, repeat)
+                results.append({
+                    'bench': name,
+                    'size': size,
+                    'cells': size * size,
+                    'dragons': dragons,
+                    'min': min(timings),
+                    'mean': sum(timings) / len(timings),
+                    'timings': timings,
+                })
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': results,
+    }
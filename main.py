@@ -1,18 +1,24 @@
-from src.libs.fltk import cree_fenetre, attend_ev, ferme_fenetre
+from src.libs.fltk import cree_fenetre, boucle_ev, ferme_fenetre
 from src.utils import State
 from src.menu import Menu
+from src import profiler
 
 
 def main():
+    # WIY_PROFILE=profile.json records where the time goes, WIY_PROFILE=profile.trace.json as a Chrome trace
+    profile = profiler.from_environment()
+
     cree_fenetre(720, 480)
 
     State.change_state(Menu())
 
-    while State.current is not None:
-        State.current.on_event(attend_ev())
+    boucle_ev(State.dispatch)
 
     ferme_fenetre()
 
+    if profile:
+        profiler.save(profile)
+
 
 if __name__ == '__main__':
     main()
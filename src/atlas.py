@@ -0,0 +1,58 @@
+from math import ceil
+from tkinter import PhotoImage
+from typing import Dict, List, Tuple
+
+from src.libs import fltk as tk
+
+
+__all__ = [
+    'Atlas',
+    'walls'
+]
+
+
+def walls(mask: int, x: float, y: float, dx: float, dy: float) -> List[Tuple[float, float, float, float, str]]:
+    """
+    Returns the rectangles drawing a room of the given door mask: the floor, then a wall for each closed door
+    """
+    rectangles = [(x, y, x + dx, y + dy, '#83769C')]
+    if not mask & 1:
+        rectangles.append((x, y, x + dx, y + dy * 0.1, '#000000'))
+    if not mask & 2:
+        rectangles.append((x + dx * 0.9, y, x + dx, y + dy, '#000000'))
+    if not mask & 4:
+        rectangles.append((x, y + dy * 0.9, x + dx, y + dy, '#000000'))
+    if not mask & 8:
+        rectangles.append((x, y, x + dx * 0.1, y + dy, '#000000'))
+    return rectangles
+
+
+class Atlas:
+    textures = {
+        'A': 'Knight_s.png',
+        'D': 'Dragon_s.png',
+        'T': 'treasure.png'
+    }
+
+    def __init__(self, dx: float, dy: float):
+        self.dx = dx
+        self.dy = dy
+        self.sprite_size = (int(dx * 0.6), int(dy * 0.6))
+        self.tiles: Dict[int, PhotoImage] = {}
+
+    def load(self) -> None:
+        """
+        Renders a tile for every door mask, and scales the sprites, at the size of the rooms
+        """
+        # Tiles are rounded up, so that rooms at fractional coords never leave a gap between them
+        width, height = ceil(self.dx), ceil(self.dy)
+        for mask in range(16):
+            self.tiles[mask] = tk.cree_image(width, height, walls(mask, 0, 0, self.dx, self.dy))
+        for symbol in self.textures:
+            tk.precharge_image(self.sprite(symbol), *self.sprite_size)
+
+    def sprite(self, symbol: str) -> str:
+        """
+        Returns the image file of the entity symbol
+        """
+        return f'assets/media/{self.textures[symbol]}'
@@ -0,0 +1,107 @@
+import mmap
+import struct
+import sys
+
+from src.engine import Dungeon, Entity, MapError
+
+
+__all__ = [
+    'load',
+    'load_binary',
+    'save_binary',
+    'convert'
+]
+
+
+# Layout: header, entity table, then one byte per room for the doors, row by row. The links are
+# not stored: computing them from the doors costs about as much as checking stored ones
+MAGIC = b'WIY2'
+HEADER = struct.Struct('<4sIII')
+ENTITY = struct.Struct('<cIII')
+
+
+def load_binary(filename: str) -> Dungeon:
+    """
+    Maps a binary map in memory. The rooms are private copy-on-write views over the file:
+    rotating a room never writes to the file
+    """
+    with open(filename, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            raise MapError('empty file', filename) from None
+
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise MapError('not a binary map', filename)
+    _, width, height, count = HEADER.unpack_from(data)
+    size = width * height
+    offset = HEADER.size + count * ENTITY.size
+    if not size or len(data) != offset + size:
+        raise MapError(f'expected {offset + size} bytes for {width}x{height} rooms, got {len(data)}', filename)
+
+    dungeon = Dungeon()
+    dungeon.width, dungeon.height = width, height
+    view = memoryview(data)
+    dungeon.grid = view[offset:]
+    if bytes(dungeon.grid).translate(None, Dungeon._masks):
+        raise MapError('invalid room', filename)
+    dungeon.relink()
+
+    for index in range(count):
+        symbol, x, y, level = ENTITY.unpack_from(data, HEADER.size + index * ENTITY.size)
+        symbol = symbol.decode('latin-1')
+        if symbol not in Dungeon._symbols:
+            raise MapError(f'unknown entity {symbol!r}', filename)
+        entity = Entity(dungeon, symbol, x, y, level)
+        if dungeon.room(entity.x, entity.y) is None:
+            raise MapError(f'entity at ({entity.x}, {entity.y}) is out of the dungeon', filename)
+        dungeon.entities.append(entity)
+    if [ent.symbol for ent in dungeon.entities].count('A') != 1:
+        raise MapError('expected exactly one knight', filename)
+    knight = next(ent for ent in dungeon.entities if ent.symbol == 'A')
+    for entity in dungeon.entities:
+        if entity is not knight and (entity.x, entity.y) == (knight.x, knight.y):
+            raise MapError(f'entity at ({entity.x}, {entity.y}) is in the room of the knight', filename)
+    dungeon.entities.sort(key=lambda ent: ent.priority)
+
+    return dungeon
+
+
+def save_binary(dungeon: Dungeon, filename: str) -> None:
+    """
+    Writes the dungeon in the binary format. Dead entities are left out
+    """
+    entities = [ent for ent in dungeon.entities if ent.alive]
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, dungeon.width, dungeon.height, len(entities)))
+        for entity in entities:
+            f.write(ENTITY.pack(entity.symbol.encode('ascii'), entity.x, entity.y, entity.level))
+        f.write(dungeon.grid)
+
+
+def load(filename: str) -> Dungeon:
+    """
+    Loads a map in the binary or the text format
+    """
+    with open(filename, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    return load_binary(filename) if binary else Dungeon.from_file(filename)
+
+
+def convert(source: str, destination: str) -> None:
+    """
+    Converts a map, the destination is written in the text format if it ends with .txt, else in the binary one
+    """
+    dungeon = load(source)
+    if destination.endswith('.txt'):
+        with open(destination, 'w', encoding='utf-8') as f:
+            dungeon.write(f)
+    else:
+        save_binary(dungeon, destination)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('usage: python -m src.binmap SOURCE DESTINATION', file=sys.stderr)
+        sys.exit(2)
+    convert(sys.argv[1], sys.argv[2])
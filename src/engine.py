@@ -1,14 +1,36 @@
 from collections import deque
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator, TextIO, Tuple
 
 
 __all__ = [
     'Dungeon',
     'Room',
-    'Entity'
+    'Entity',
+    'MapError'
 ]
 
 
+class MapError(ValueError):
+    def __init__(self, message: str, filename: str = '<stream>', line: Optional[int] = None):
+        self.filename = filename
+        self.line = line
+        super().__init__(f'{filename}:{line}: {message}' if line is not None else f'{filename}: {message}')
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(n: int) -> int:
+    """
+    Returns a pseudo-random 64 bits key for the given number (splitmix64 finalizer), so that the
+    hashing keys need no table
+    """
+    n = (n + 0x9E3779B97F4A7C15) & _MASK64
+    n = ((n ^ n >> 30) * 0xBF58476D1CE4E5B9) & _MASK64
+    n = ((n ^ n >> 27) * 0x94D049BB133111EB) & _MASK64
+    return n ^ n >> 31
+
+
 class Room:
     char_map = {
         '╨': 1, '╞': 2, '╥': 4, '╡': 8,
@@ -25,12 +47,31 @@ class Room:
         15: '╬',
     }
 
-    def __init__(self, dungeon: 'Dungeon', value: str, x: int, y: int):
+    __slots__ = ('dungeon', 'x', 'y')
+
+    def __init__(self, dungeon: 'Dungeon', x: int, y: int):
         self.dungeon = dungeon
-        self.value = Room.char_map[value]
         self.x = x
         self.y = y
 
+    @property
+    def index(self) -> int:
+        """
+        Returns the index of the room in the dungeon grid
+        """
+        return self.y * self.dungeon.width + self.x
+
+    @property
+    def value(self) -> int:
+        """
+        Returns the door bitmask of the room
+        """
+        return self.dungeon.grid[self.index]
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self.dungeon.set_mask(self.index, value)
+
     def rotate_right(self) -> None:
         """
         Rotates the room right
@@ -76,25 +117,28 @@ class Room:
         """
         Returns all the active neighbors of the current room
         """
+        links = self.dungeon.links[self.index]
         neighbors = set()
-        if self.top:
-            top = self.dungeon.room(self.x, self.y - 1)
-            neighbors.add(top) if top is not None and top.bottom else None
-        if self.right:
-            right = self.dungeon.room(self.x + 1, self.y)
-            neighbors.add(right) if right is not None and right.left else None
-        if self.bottom:
-            bottom = self.dungeon.room(self.x, self.y + 1)
-            neighbors.add(bottom) if bottom is not None and bottom.top else None
-        if self.left:
-            left = self.dungeon.room(self.x - 1, self.y)
-            neighbors.add(left) if left is not None and left.right else None
+        if links & 1:
+            neighbors.add(Room(self.dungeon, self.x, self.y - 1))
+        if links & 2:
+            neighbors.add(Room(self.dungeon, self.x + 1, self.y))
+        if links & 4:
+            neighbors.add(Room(self.dungeon, self.x, self.y + 1))
+        if links & 8:
+            neighbors.add(Room(self.dungeon, self.x - 1, self.y))
         return neighbors
 
     @property
     def symbol(self):
         return Room.repr_map[self.value]
 
+    def __eq__(self, other):
+        return isinstance(other, Room) and self.dungeon is other.dungeon and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.dungeon), self.x, self.y))
+
     def __repr__(self):
         return f'<Room(x={self.x}, y={self.y}, symbol=\'{self.symbol}\')>'
 
@@ -112,7 +156,57 @@ class Entity:
         """
         Moves the entity to the given room
         """
+        old = self.key() if self.dungeon._hash is not None else 0
         self.x, self.y = room.x, room.y
+        self.dungeon.version += 1
+        self.dungeon._rehash(old, self)
+
+    def kill(self):
+        """
+        Kills the entity
+        """
+        old = self.key() if self.dungeon._hash is not None else 0
+        self.alive = False
+        self.dungeon.version += 1
+        self.dungeon._rehash(old, self)
+
+    def level_up(self):
+        """
+        Raises the level of the entity by one
+        """
+        old = self.key() if self.dungeon._hash is not None else 0
+        self.level += 1
+        self.dungeon._rehash(old, self)
+
+    @property
+    def state(self) -> tuple:
+        """
+        Returns the position, the level and the life of the entity
+        """
+        return self.x, self.y, self.level, self.alive
+
+    @state.setter
+    def state(self, state: tuple) -> None:
+        old = self.key() if self.dungeon._hash is not None else 0
+        self.x, self.y, self.level, self.alive = state
+        self.dungeon.version += 1
+        self.dungeon._rehash(old, self)
+
+    def key(self) -> int:
+        """
+        Returns the hashing key of the entity in its current state, dead entities having none
+        """
+        if not self.alive:
+            return 0
+        index = self.y * self.dungeon.width + self.x
+        return _mix(1 << 62 | self.level << 34 | Dungeon._symbols.index(self.symbol) << 32 | index)
+
+    @property
+    def priority(self):
+        """
+        Returns the sort key of the entity: the knight goes to the reachable target with the highest one
+        """
+        return self.symbol, self.level
 
     @property
     def room(self):
@@ -127,85 +221,329 @@ class Entity:
 
 class Dungeon:
     def __init__(self):
-        self.rooms: Dict[tuple[int, int]: Room] = {}
+        # Door bitmasks of every room, row by row: the room (x, y) is at y * width + x
+        self.grid = bytearray()
+        # Bitmasks of the doors opened on both sides, with the same layout as the grid
+        self.links = bytearray()
         self.entities: List[Entity] = []
         self.width = 0
         self.height = 0
+        # Bumped on every change of the dungeon, which could change the path of the knight
+        self.version = 0
+        self._route: Optional[List[Room]] = None
+        self._route_version = -1
+        # Sum of the keys of the rooms and the alive entities, computed on the first use then
+        # kept up to date. Keys are summed rather than xored, so that two identical entities in
+        # the same room do not cancel out
+        self._hash: Optional[int] = None
+
+    # Translates a row of the text format into door bitmasks
+    _decode = str.maketrans({symbol: chr(value) for symbol, value in Room.char_map.items()})
+    _encode = str.maketrans({chr(value): symbol for value, symbol in Room.repr_map.items()})
+    _masks = bytes(range(1, 16))
+    _symbols = ('A', 'D', 'T')
+    _planes = {bit: bytes(value & bit for value in range(256)) for bit in (1, 2, 4, 8)}
 
     @classmethod
     def from_file(cls, filename: str):
-        self = cls()
-
-        # Decode the file
-        with open(filename) as f:
-            lines = f.read().split('\n')
-            for y, line in enumerate(lines):
-                if any([line.startswith(symbol) for symbol in Room.char_map.keys()]):
-                    for x, value in enumerate(line):
-                        self.rooms[(x, y)] = Room(self, value, x, y)
-                        self.width, self.height = x + 1, y + 1
-                else:
-                    self.entities += [Entity(self, *line.split())]
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_stream(f, filename)
 
-        self.entities.sort(key=lambda ent: (ent.symbol, ent.level))
+    @classmethod
+    def from_stream(cls, stream: Iterable[str], filename: str = '<stream>'):
+        """
+        Decodes a map line by line. Raises a MapError with the line number on invalid input
+        """
+        self = cls()
+        numbers = []
+
+        for number, line in enumerate(stream, 1):
+            line = line.rstrip()
+            if not line:
+                continue
+
+            if line[0] in Room.char_map:
+                try:
+                    row = line.translate(Dungeon._decode).encode('latin-1')
+                    if row.translate(None, Dungeon._masks):
+                        raise ValueError
+                except ValueError:
+                    column = next(col for col, char in enumerate(line) if char not in Room.char_map)
+                    raise MapError(f'unknown room {line[column]!r} at column {column + 1}', filename, number) from None
+
+                if self.height and len(row) != self.width:
+                    raise MapError(f'row of {len(row)} rooms, expected {self.width}', filename, number)
+                self.grid += row
+                self.width, self.height = len(row), self.height + 1
+
+            else:
+                fields = line.split()
+                if fields[0] not in Dungeon._symbols:
+                    raise MapError(f'unknown entity {fields[0]!r}', filename, number)
+                if len(fields) not in (3, 4):
+                    raise MapError(f'expected "{fields[0]} x y [level]", got {line!r}', filename, number)
+                try:
+                    self.entities.append(Entity(self, *fields))
+                except ValueError:
+                    raise MapError(f'coordinates and level must be integers, got {line!r}', filename, number) from None
+                numbers.append(number)
+
+        if not self.height:
+            raise MapError('no rooms', filename)
+        for entity, number in zip(self.entities, numbers):
+            if self.room(entity.x, entity.y) is None:
+                raise MapError(f'entity at ({entity.x}, {entity.y}) is out of the dungeon', filename, number)
+        if [ent.symbol for ent in self.entities].count('A') != 1:
+            raise MapError('expected exactly one knight', filename)
+        # The knight only fights in the rooms it moves to
+        knight = next(ent for ent in self.entities if ent.symbol == 'A')
+        for entity, number in zip(self.entities, numbers):
+            if entity is not knight and (entity.x, entity.y) == (knight.x, knight.y):
+                raise MapError(f'entity at ({entity.x}, {entity.y}) is in the room of the knight', filename, number)
+
+        self.relink()
+        self.entities.sort(key=lambda ent: ent.priority)
 
         return self
 
-    def room(self, x: int, y: int) -> Room:
+    def write(self, stream: TextIO) -> None:
+        """
+        Writes the dungeon in the text format of the maps. Dead entities are left out
+        """
+        for y in range(self.height):
+            row = bytes(self.grid[y * self.width:(y + 1) * self.width])
+            stream.write(row.decode('latin-1').translate(Dungeon._encode) + '\n')
+        for entity in self.entities:
+            if entity.alive:
+                level = '' if entity.symbol == 'A' and entity.level == 1 else f' {entity.level}'
+                stream.write(f'{entity.symbol} {entity.x} {entity.y}{level}\n')
+
+    def snapshot(self) -> Tuple[bytes, tuple]:
+        """
+        Returns the state of the dungeon as an immutable value: the door masks and the entity states
+        """
+        return bytes(self.grid), tuple(entity.state for entity in self.entities)
+
+    def restore(self, snapshot: Tuple[bytes, tuple]) -> None:
+        """
+        Puts the dungeon back in the state of a snapshot, only changing the rooms and the entities which differ
+        """
+        grid, states = snapshot
+        if self.grid != grid:
+            for index in [index for index in range(len(grid)) if self.grid[index] != grid[index]]:
+                self.set_mask(index, grid[index])
+        for entity, state in zip(self.entities, states):
+            if entity.state != state:
+                entity.state = state
+
+    def copy(self) -> 'Dungeon':
+        """
+        Returns an independent copy of the dungeon
+        """
+        other = Dungeon()
+        other.width, other.height = self.width, self.height
+        other.grid = bytearray(self.grid)
+        other.links = bytearray(self.links)
+        for entity in self.entities:
+            clone = Entity(other, entity.symbol, entity.x, entity.y, entity.level)
+            clone.alive = entity.alive
+            other.entities.append(clone)
+        other._hash = self._hash
+        # The cached path is kept, so that the copy moves the knight exactly as the dungeon would
+        other.version = self.version
+        if self._route is not None:
+            other._route = [Room(other, room.x, room.y) for room in self._route]
+        other._route_version = self._route_version
+        return other
+
+    def room(self, x: int, y: int) -> Optional[Room]:
         """
         Returns the room in the x, y coords, if exists
         """
-        return self.rooms.get((x, y))
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return Room(self, x, y)
+
+    def connections(self, index: int) -> int:
+        """
+        Returns the bitmask of the doors of the given room, which are opened on both sides
+        """
+        grid, width = self.grid, self.width
+        value = grid[index]
+        x, y = index % width, index // width
+        links = 0
+        if value & 1 and y > 0 and grid[index - width] & 4:
+            links |= 1
+        if value & 2 and x < width - 1 and grid[index + 1] & 8:
+            links |= 2
+        if value & 4 and y < self.height - 1 and grid[index + width] & 1:
+            links |= 4
+        if value & 8 and x > 0 and grid[index - 1] & 2:
+            links |= 8
+        return links
+
+    def relink(self) -> None:
+        """
+        Recomputes the links of every room at once
+        """
+        # Each byte of the planes holds a single door bit of its room, so the whole grid can be
+        # shifted and combined as one big integer, a door bit landing on the facing one of the neighbor
+        grid, width, size = bytes(self.grid), self.width, len(self.grid)
+        top, right, bottom, left = (int.from_bytes(grid.translate(Dungeon._planes[bit]), 'little') for bit in (1, 2, 4, 8))
+        inner = int.from_bytes((b'\xff' * (width - 1) + b'\x00') * self.height, 'little')
+        links = (top & bottom << (8 * width - 2)
+                 | right & left >> 10 & inner
+                 | bottom & top >> (8 * width - 2)
+                 | left & right << 10 & inner << 8)
+        self.links = bytearray(links.to_bytes(size, 'little'))
+
+    def set_mask(self, index: int, value: int) -> None:
+        """
+        Changes the doors of the given room, and updates the links of the room and its neighbors
+        """
+        if self._hash is not None:
+            self._hash = (self._hash - _mix(index << 4 | self.grid[index]) + _mix(index << 4 | value)) & _MASK64
+        self.grid[index] = value
+        self.version += 1
+        self.links[index] = links = self.connections(index)
+        width = self.width
+        x, y = index % width, index // width
+        if y > 0:
+            self.links[index - width] = self.links[index - width] & ~4 | (links & 1) << 2
+        if x < width - 1:
+            self.links[index + 1] = self.links[index + 1] & ~8 | (links & 2) << 2
+        if y < self.height - 1:
+            self.links[index + width] = self.links[index + width] & ~1 | (links & 4) >> 2
+        if x > 0:
+            self.links[index - 1] = self.links[index - 1] & ~2 | (links & 8) >> 2
+
+    def _rehash(self, old: int, entity: Entity) -> None:
+        if self._hash is not None:
+            self._hash = (self._hash - old + entity.key()) & _MASK64
+
+    @property
+    def state_hash(self) -> int:
+        """
+        Returns a 64 bits hash of the rooms and the alive entities, kept up to date on every change
+        """
+        if self._hash is None:
+            grid = self.grid
+            total = sum(_mix(index << 4 | grid[index]) for index in range(len(grid)))
+            total += sum(entity.key() for entity in self.entities)
+            self._hash = total & _MASK64
+        return self._hash
+
+    @property
+    def rooms(self) -> Iterator[Room]:
+        """
+        Iterates over all the rooms of the dungeon, row by row
+        """
+        for y in range(self.height):
+            for x in range(self.width):
+                yield Room(self, x, y)
 
     def bfs(self) -> Optional[List[Room]]:
         """
         Returns the sortest path to the highest priority target from the available, if any
         """
         player = self.entities[0]
-        targets = [e for e in self.entities if e.symbol != 'A' and e.alive]
-        paths = []
-
-        visited = set()
-        queue = deque([(player.room, [player.room])])
+        width, links = self.width, self.links
+
+        # Index the alive targets by the room they are in, and rank them by decreasing priority
+        targets: Dict[int, List[Entity]] = {}
+        ranking = []
+        for entity in self.entities:
+            if entity.symbol != 'A' and entity.alive:
+                targets.setdefault(entity.y * width + entity.x, []).append(entity)
+                ranking.append(entity)
+        ranking.sort(key=lambda ent: ent.priority, reverse=True)
+
+        # Single pass over the reachable rooms, remembering where each room was reached from
+        start = player.y * width + player.x
+        parents = {start: -1}
+        found = set()
+        best, best_index = None, -1
+        top = 0
+        queue = deque([start])
 
         while queue:
-            room, path = queue.popleft()
-
-            for target in targets:
-                if room == target.room:
-                    paths += [(target, path)]
-                    targets.remove(target)
+            index = queue.popleft()
+
+            if index in targets:
+                # On equal priorities, the last target found wins
+                for target in targets[index]:
+                    found.add(target)
+                    if best is None or target.priority >= best.priority:
+                        best, best_index = target, index
+
+                # Stop as soon as none of the targets left to find could be chosen over the best one
+                while top < len(ranking) and ranking[top] in found:
+                    top += 1
+                if top == len(ranking) or ranking[top].priority < best.priority:
                     break
 
-            if room not in visited:
-                visited.add(room)
-
-                for neighbor in room.neighbors:
-                    if neighbor not in visited:
-                        queue.append((neighbor, path + [neighbor]))
-
-        if len(paths):
-            paths.sort(key=lambda tup: (tup[0].symbol, tup[0].level))
-            return paths[-1][1]
-        return
+            mask = links[index]
+            if mask & 1 and index - width not in parents:
+                parents[index - width] = index
+                queue.append(index - width)
+            if mask & 2 and index + 1 not in parents:
+                parents[index + 1] = index
+                queue.append(index + 1)
+            if mask & 4 and index + width not in parents:
+                parents[index + width] = index
+                queue.append(index + width)
+            if mask & 8 and index - 1 not in parents:
+                parents[index - 1] = index
+                queue.append(index - 1)
+
+        if best is None:
+            return
+
+        # Rebuild the path to the chosen target only
+        index = best_index
+        path = []
+        while index != -1:
+            path.append(Room(self, index % width, index // width))
+            index = parents[index]
+        path.reverse()
+        return path
+
+    def path(self) -> Optional[List[Room]]:
+        """
+        Returns the path the knight will follow, computed at most once per version of the dungeon
+        """
+        if self._route_version != self.version:
+            self._route = self.bfs()
+            self._route_version = self.version
+        return self._route
 
     def update_dungeon(self) -> bool:
         """
         Updates the dungeon. Returns False, if the game is over, otherwise True
         """
-        path = self.bfs()
+        path = self.path()
         player = self.entities[0]
 
         if path is not None:
             player.move(path[1])
+            fought = False
 
             for entity in [e for e in self.entities if e.symbol != 'A' and e.alive]:
                 if entity.room == player.room:
+                    fought = True
                     if entity.level > player.level:
-                        player.alive = False
+                        player.kill()
                     else:
-                        entity.alive = False
-                        player.level += 1
+                        entity.kill()
+                        player.level_up()
+
+            # Without any fight, the rest of the path stays the shortest one to the same target, unless
+            # another target shares its priority: the last one found wins, which depends on the start
+            if not fought:
+                targets = [e for e in self.entities if e.symbol != 'A' and e.alive]
+                best = max(e.priority for e in targets if e.room == path[-1])
+                if [e.priority for e in targets].count(best) == 1:
+                    self._route = path[1:]
+                    self._route_version = self.version
 
         return not player.alive or not len([d for d in self.dragons if d.alive])
 
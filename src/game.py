@@ -1,58 +1,136 @@
 from src.utils import State
 from src.libs import fltk as tk
-from src.engine import Dungeon
+from src.binmap import load
+from src.atlas import Atlas
+from src.solver import solve
+from src.headless import TURN, RIGHT, LEFT
+from src.replay import Recorder, new_file
+from src.history import UNDO, History
+from src.profiler import span
 
 
 class Game(State):
     def __init__(self):
+        super().__init__()
         with self.proxy as storage:
-            name = storage['map']
+            path = storage['map']
 
-        self.dungeon = Dungeon.from_file(f'assets/maps/{name}.txt')
+        self.path = path
+        self.dungeon = load(path)
         self.dx = 720 / self.dungeon.width
         self.dy = 480 / self.dungeon.height
-        self.texture_map = {
-            'A': 'Knight_s.png',
-            'D': 'Dragon_s.png',
-            'T': 'treasure.png'
-        }
+        self.atlas = Atlas(self.dx, self.dy)
 
     def on_enter(self):
+        self.atlas.load()
+        self.recorder = Recorder(new_file(), self.path)
+        self.history = History(self.dungeon)
+
+        # What is currently on the canvas: the door mask of each room (0 for none), and the state of each entity
+        self.drawn = bytearray(len(self.dungeon.grid))
+        self.sprites = {}
+        self.path_version = -1
         self.draw()
 
     def draw(self):
-        tk.efface_tout()
-        for room in self.dungeon.rooms.values():
-            x = room.x * self.dx
-            y = room.y * self.dy
-            tk.rectangle(x, y, x + self.dx, y + self.dy, remplissage='#83769C', epaisseur=0)
-            if not room.top:
-                tk.rectangle(x, y, x + self.dx, y + self.dy * 0.1, remplissage='#000000', epaisseur=0)
-            if not room.right:
-                tk.rectangle(x + self.dx * 0.9, y, x + self.dx, y + self.dy, remplissage='#000000', epaisseur=0)
-            if not room.bottom:
-                tk.rectangle(x, y + self.dy * 0.9, x + self.dx, y + self.dy, remplissage='#000000', epaisseur=0)
-            if not room.left:
-                tk.rectangle(x, y, x + self.dx * 0.1, y + self.dy, remplissage='#000000', epaisseur=0)
-
-        for entity in self.dungeon.entities:
-            if entity.alive:
-                tk.image((entity.x + 0.5) * self.dx, (entity.y + 0.5) * self.dy, f'assets/media/{self.texture_map[entity.symbol]}', int(self.dx * 0.6), int(self.dy * 0.6))
-                tk.texte(entity.x * self.dx, entity.y * self.dy, entity.level)
+        """
+        Redraws only the rooms, the path and the entities which changed since the last draw
+        """
+        with span('draw'):
+            # The whole redraw goes to Tcl in a single call
+            tk.debut_trame()
+            try:
+                self._draw()
+            finally:
+                tk.fin_trame()
+
+    def _draw(self):
+        grid, drawn, width = self.dungeon.grid, self.drawn, self.dungeon.width
+
+        dirty = []
+        if grid != drawn:
+            for start in range(0, len(grid), width):
+                if grid[start:start + width] != drawn[start:start + width]:
+                    dirty += [index for index in range(start, start + width) if grid[index] != drawn[index]]
+
+        for index in dirty:
+            tag = f'room{index}'
+            tk.efface(tag)
+            tk.image(index % width * self.dx, index // width * self.dy, self.atlas.tiles[grid[index]], ancrage='nw', tag=tag)
+            drawn[index] = grid[index]
+
+        if self.path_version != self.dungeon.version:
+            self.path_version = self.dungeon.version
+            tk.efface('path')
+            path = self.dungeon.path()
+            if path is not None:
+                for room in path[1:]:
+                    tk.cercle((room.x + 0.5) * self.dx, (room.y + 0.5) * self.dy, min(self.dx, self.dy) * 0.08,
+                              remplissage='#FFEC27', epaisseur=0, tag='path')
+
+        for number, entity in enumerate(self.dungeon.entities):
+            state = (entity.x, entity.y, entity.level, entity.alive)
+            if self.sprites.get(number) != state:
+                self.sprites[number] = state
+                tag = f'entity{number}'
+                tk.efface(tag)
+                if entity.alive:
+                    tk.image((entity.x + 0.5) * self.dx, (entity.y + 0.5) * self.dy, self.atlas.sprite(entity.symbol), *self.atlas.sprite_size, tag=f'entity {tag}')
+                    tk.texte(entity.x * self.dx, entity.y * self.dy, entity.level, tag=f'entity {tag}')
+
+        # Redrawn rooms are stacked over everything else
+        if dirty:
+            tk.premier_plan('path')
+            tk.premier_plan('entity')
+
+    def hint(self):
+        """
+        Shows the first action of a winning plan: the room to click, or the space key to press
+        """
+        plan = solve(self.dungeon, max_nodes=5000)
+        if plan is None:
+            tk.texte(360, 240, 'No hint', couleur='#FFEC27', ancrage='center', tag='hint')
+        elif plan[0][0] == TURN:
+            tk.texte(360, 240, 'Space', couleur='#FFEC27', ancrage='center', tag='hint')
+        else:
+            kind, x, y = plan[0]
+            tk.rectangle(x * self.dx, y * self.dy, (x + 1) * self.dx, (y + 1) * self.dy,
+                         couleur='#FFEC27', epaisseur=4, tag='hint')
+            # A left click turns the room right
+            tk.texte((x + 0.5) * self.dx, (y + 0.5) * self.dy, 'Left\nclick' if kind == RIGHT else 'Right\nclick',
+                     couleur='#FFEC27', ancrage='center', taille=12, tag='hint')
 
     def on_event(self, ev: tk.FltkEvent):
         super().on_event(ev)
-        if tk.type_ev(ev) == 'Touche' and tk.touche(ev) == 'space':
-            if self.dungeon.update_dungeon():
+        # A hint only stands until the next action
+        tk.efface('hint')
+        if tk.type_ev(ev) == 'Touche' and tk.touche(ev) == 'h':
+            self.hint()
+            return
+        if tk.type_ev(ev) == 'Touche' and tk.touche(ev) == 'u':
+            if self.history.undo():
+                self.recorder.record((UNDO,), self.dungeon.width)
+        elif tk.type_ev(ev) == 'Touche' and tk.touche(ev) == 'space':
+            self.recorder.record((TURN,), self.dungeon.width)
+            self.history.record((TURN,))
+            with span('update_dungeon'):
+                ended = self.dungeon.update_dungeon()
+            if ended:
                 self.over()
                 return
-        elif tk.type_ev(ev) == 'ClicGauche':
-            self.dungeon.room(tk.abscisse(ev) // self.dx, tk.ordonnee(ev) // self.dy).rotate_right()
-        elif tk.type_ev(ev) == 'ClicDroit':
-            self.dungeon.room(tk.abscisse(ev) // self.dx, tk.ordonnee(ev) // self.dy).rotate_left()
+        elif tk.type_ev(ev) in ('ClicGauche', 'ClicDroit'):
+            x, y = int(tk.abscisse(ev) // self.dx), int(tk.ordonnee(ev) // self.dy)
+            action = RIGHT if tk.type_ev(ev) == 'ClicGauche' else LEFT
+            self.recorder.record((action, x, y), self.dungeon.width)
+            self.history.record((action, x, y))
+            if action == RIGHT:
+                self.dungeon.room(x, y).rotate_right()
+            else:
+                self.dungeon.room(x, y).rotate_left()
         self.draw()
 
     def on_exit(self):
+        self.recorder.close()
         tk.efface_tout()
 
     def over(self):
@@ -0,0 +1,162 @@
+import argparse
+import io
+import itertools
+import os
+import random
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator, List, NamedTuple, Optional
+
+from src.engine import Dungeon, Room
+from src.headless import Action, play
+from src.solver import solve
+
+
+__all__ = [
+    'Level',
+    'maze',
+    'generate',
+    'stream'
+]
+
+
+class Level(NamedTuple):
+    seed: int
+    # Map in the text format of the maps directory
+    text: str
+    # Script winning the level, as checked by the headless runner
+    plan: List[Action]
+
+
+def maze(width: int, height: int, rnd: random.Random) -> bytearray:
+    """
+    Returns the door masks of a random perfect maze: every room is reachable through a single path
+    """
+    grid = bytearray(width * height)
+    seen = bytearray(width * height)
+    stack = [rnd.randrange(width * height)]
+    seen[stack[0]] = 1
+
+    # Depth first carving, without recursion so that large mazes do not overflow the stack
+    while stack:
+        index = stack[-1]
+        x, y = index % width, index // width
+        moves = [(door, index + step, back) for door, step, back, free in (
+            (1, -width, 4, y > 0),
+            (2, 1, 8, x < width - 1),
+            (4, width, 1, y < height - 1),
+            (8, -1, 2, x > 0),
+        ) if free and not seen[index + step]]
+        if not moves:
+            stack.pop()
+            continue
+        door, neighbor, back = rnd.choice(moves)
+        grid[index] |= door
+        grid[neighbor] |= back
+        seen[neighbor] = 1
+        stack.append(neighbor)
+
+    return grid
+
+
+def _layout(width: int, height: int, dragons: int, spread: int, treasure: bool, rnd: random.Random) -> str:
+    grid = maze(width, height, rnd)
+
+    # Dragons wait in dead ends when there are enough, so that turning a single room hides them
+    cells = rnd.sample(range(width * height), width * height)
+    cells.sort(key=lambda index: grid[index] not in (1, 2, 4, 8))
+    knight, lairs = cells[-1], cells[:dragons + treasure]
+
+    # Sorted by level, the n-th dragon is at most level n, so that they can be fought in order
+    levels = [max(1, number + 1 - rnd.randint(0, spread)) for number in range(dragons)]
+
+    # Scrambled rooms, so that the maze has to be turned back
+    for index in range(width * height):
+        for _ in range(rnd.randrange(4)):
+            grid[index] = (grid[index] << 1) & 0xF | (grid[index] >> 3)
+
+    lines = [''.join(Room.repr_map[value] for value in grid[start:start + width])
+             for start in range(0, width * height, width)]
+    lines.append(f'A {knight % width} {knight // width}')
+    for index, level in zip(lairs, levels):
+        lines.append(f'D {index % width} {index // width} {level}')
+    if treasure:
+        lines.append(f'T {lairs[-1] % width} {lairs[-1] // width}')
+    return '\n'.join(lines) + '\n'
+
+
+def generate(seed: int, width: int = 6, height: int = 6, dragons: int = 3, spread: int = 0,
+             treasure: bool = False, attempts: int = 20, max_nodes: int = 20000) -> Optional[Level]:
+    """
+    Returns a level, only if the solver found a plan winning it, else None after the given attempts.
+    The level only depends on the seed and the parameters.
+    spread lowers the levels of the dragons: with 0, they are 1, 2, 3... the knight has to fight them all in order
+    """
+    rnd = random.Random(seed)
+    for _ in range(attempts):
+        text = _layout(width, height, dragons, spread, treasure, rnd)
+        dungeon = Dungeon.from_stream(io.StringIO(text))
+        plan = solve(dungeon, max_nodes=max_nodes)
+        # The plan ends with the last fight: the knight is given no turn past it
+        if plan is not None and play(dungeon, plan, max_turns=len(plan)).result == 'win':
+            return Level(seed, text, plan)
+
+
+def stream(count: Optional[int] = None, seed: int = 0, workers: Optional[int] = 1, window: Optional[int] = None,
+           **params) -> Iterator[Level]:
+    """
+    Yields levels generated from the seeds seed, seed + 1... in this order, endlessly if count is None.
+    With several workers, at most window levels are pending at once, so that memory stays bounded
+    """
+    seeds = range(seed, seed + count) if count is not None else itertools.count(seed)
+    job = partial(generate, **params)
+
+    if workers == 1:
+        for number in seeds:
+            level = job(number)
+            if level is not None:
+                yield level
+        return
+
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for number in seeds:
+            pending.append(executor.submit(job, number))
+            if len(pending) >= window:
+                level = pending.popleft().result()
+                if level is not None:
+                    yield level
+        while pending:
+            level = pending.popleft().result()
+            if level is not None:
+                yield level
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m src.generator', description='Generates solvable levels')
+    parser.add_argument('count', type=int, help='number of seeds to try')
+    parser.add_argument('--size', type=int, nargs=2, default=[6, 6], metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--dragons', type=int, default=3)
+    parser.add_argument('--spread', type=int, default=0, help='how much lower the dragon levels may be')
+    parser.add_argument('--treasure', action='store_true', help='adds a treasure in a dead end')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--workers', type=int, default=None, help='processes, all the cores by default')
+    parser.add_argument('--output', default='.', help='directory of the level files')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    levels = stream(args.count, args.seed, args.workers, width=args.size[0], height=args.size[1],
+                    dragons=args.dragons, spread=args.spread, treasure=args.treasure)
+    for level in levels:
+        filename = os.path.join(args.output, f'level{level.seed}.txt')
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(level.text)
+        print(filename, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.binmap import load
+from src.engine import Dungeon
+
+
+__all__ = [
+    'TURN',
+    'RIGHT',
+    'LEFT',
+    'Outcome',
+    'apply',
+    'play',
+    'run',
+    'run_many'
+]
+
+
+# Actions of a script: (TURN,) lets the knight move, (RIGHT, x, y) and (LEFT, x, y) rotate a room
+TURN, RIGHT, LEFT = 'turn', 'right', 'left'
+Action = Tuple
+Job = Union[str, Tuple[str, Sequence[Action]]]
+
+
+class Outcome(NamedTuple):
+    # 'win', 'loss', 'stuck' when the knight has nowhere to go, or 'timeout'
+    result: str
+    turns: int
+    levels: Tuple[int, ...]
+
+
+def apply(dungeon: Dungeon, action: Action) -> bool:
+    """
+    Applies the action to the dungeon. Returns True, if the game is over
+    """
+    kind = action[0]
+    if kind == TURN:
+        return dungeon.update_dungeon()
+
+    room = dungeon.room(action[1], action[2])
+    if room is None:
+        raise ValueError(f'No room at ({action[1]}, {action[2]})')
+    if kind == RIGHT:
+        room.rotate_right()
+    elif kind == LEFT:
+        room.rotate_left()
+    else:
+        raise ValueError(f'Unknown action {kind!r}')
+    return False
+
+
+def play(dungeon: Dungeon, script: Iterable[Action] = (), max_turns: Optional[int] = None) -> Outcome:
+    """
+    Plays the script on the dungeon, then lets the knight move until the game is over.
+    By default, the game times out after width * height turns per entity past the script: the
+    knight needs less to reach every target, so that it is then going back and forth between two
+    equal ones
+    """
+    turns = 0
+    over = False
+
+    for action in script:
+        if max_turns is not None and turns >= max_turns:
+            break
+        turns += action[0] == TURN
+        if apply(dungeon, action):
+            over = True
+            break
+
+    if max_turns is None:
+        max_turns = turns + dungeon.width * dungeon.height * len(dungeon.entities)
+    while not over:
+        if turns >= max_turns:
+            return Outcome('timeout', turns, tuple(ent.level for ent in dungeon.entities))
+        # Without rotations, the dungeon will not change anymore
+        if dungeon.path() is None:
+            return Outcome('stuck', turns, tuple(ent.level for ent in dungeon.entities))
+        turns += 1
+        over = dungeon.update_dungeon()
+
+    result = 'win' if dungeon.player.alive else 'loss'
+    return Outcome(result, turns, tuple(ent.level for ent in dungeon.entities))
+
+
+def run(filename: str, script: Iterable[Action] = (), max_turns: Optional[int] = None) -> Outcome:
+    """
+    Loads the map, in the text or the binary format, and plays it headlessly
+    """
+    return play(load(filename), script, max_turns)
+
+
+def _run_job(job: Job, max_turns: Optional[int] = None) -> Outcome:
+    if isinstance(job, str):
+        return run(job, max_turns=max_turns)
+    return run(*job, max_turns=max_turns)
+
+
+def run_many(jobs: Iterable[Job], workers: Optional[int] = None,
+             max_turns: Optional[int] = None, chunksize: Optional[int] = None) -> List[Outcome]:
+    """
+    Plays every job, a map filename or a (filename, script) pair, on all the cores.
+    The outcomes are returned in the order of the jobs
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    # Large chunks amortize the inter-process communication, while keeping every worker busy
+    chunksize = chunksize or max(1, len(jobs) // (workers * 4))
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(partial(_run_job, max_turns=max_turns), jobs, chunksize=chunksize))
+
+
+if __name__ == '__main__':
+    for filename, outcome in zip(sys.argv[1:], run_many(sys.argv[1:])):
+        print(f'{filename}: {outcome.result} in {outcome.turns} turns, levels {outcome.levels}')
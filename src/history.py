@@ -0,0 +1,60 @@
+from collections import deque
+from typing import Deque, Tuple
+
+from src.engine import Dungeon
+from src.headless import TURN, Action
+
+
+__all__ = [
+    'UNDO',
+    'LIMIT',
+    'History'
+]
+
+
+# Action of a replay: undoes the last action still in the history
+UNDO = 'undo'
+# Actions which can be undone, by default
+LIMIT = 1000
+
+# Doors of the rotated rooms, then states of the entities, before an action
+Delta = Tuple[Tuple[Tuple[int, int], ...], tuple]
+
+
+class History:
+    """
+    Undo stack of a dungeon. An entry only holds what its action changes: the doors of the rotated
+    room, or the states of the entities before a turn. Past the limit, the oldest entries are dropped
+    """
+
+    def __init__(self, dungeon: Dungeon, limit: int = LIMIT):
+        self.dungeon = dungeon
+        self.deltas: Deque[Delta] = deque(maxlen=limit)
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def record(self, action: Action) -> None:
+        """
+        Remembers what the action, about to be applied, changes
+        """
+        dungeon = self.dungeon
+        if action[0] == TURN:
+            self.deltas.append(((), tuple(entity.state for entity in dungeon.entities)))
+        else:
+            index = action[2] * dungeon.width + action[1]
+            self.deltas.append((((index, dungeon.grid[index]),), ()))
+
+    def undo(self) -> bool:
+        """
+        Puts the dungeon back as it was before the last action. Returns False, if there was none
+        """
+        if not self.deltas:
+            return False
+        rooms, states = self.deltas.pop()
+        for index, value in rooms:
+            self.dungeon.set_mask(index, value)
+        for entity, state in zip(self.dungeon.entities, states):
+            if entity.state != state:
+                entity.state = state
+        return True
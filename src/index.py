@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.binmap import load
+from src.engine import MapError
+from src.headless import play
+
+
+__all__ = [
+    'Metadata',
+    'MapIndex',
+    'describe'
+]
+
+
+class Metadata(NamedTuple):
+    width: int
+    height: int
+    dragons: int
+    # Outcome of the game played without any rotation: 'win', 'loss', 'stuck', or 'timeout' when
+    # the knight still walks after the turn limit, going back and forth between equal targets
+    result: str
+    turns: int
+    # Sum of the dragon levels, the knight has to reach the highest one to win
+    difficulty: int
+
+
+def digest(path: str) -> str:
+    """
+    Returns the hash of the content of the file
+    """
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def describe(path: str) -> Metadata:
+    """
+    Loads the map and plays it once without rotations
+    """
+    dungeon = load(path)
+    width, height, dragons = dungeon.width, dungeon.height, dungeon.dragons
+    difficulty = sum(dragon.level for dragon in dragons)
+    outcome = play(dungeon)
+    return Metadata(width, height, len(dragons), outcome.result, outcome.turns, difficulty)
+
+
+class MapIndex:
+    """
+    Metadata of the maps of a directory, cached in a JSON file. Results are keyed by the hash of the
+    map files, so a map is only analysed again when its content changes
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.changed = False
+        # File name -> [mtime, size, hash], to skip hashing the files which were not touched
+        self.files: Dict[str, List] = {}
+        # Hash -> metadata, None for the invalid maps
+        self.maps: Dict[str, Optional[List]] = {}
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+            self.files, self.maps = data['files'], data['maps']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _known(self, name: str, stat: os.stat_result) -> Optional[str]:
+        record = self.files.get(name)
+        if record is not None and record[:2] == [stat.st_mtime_ns, stat.st_size] and record[2] in self.maps:
+            return record[2]
+
+    def _key(self, path: str, stat: Optional[os.stat_result]) -> str:
+        stat = stat or os.stat(path)
+        name = os.path.basename(path)
+        key = self._known(name, stat)
+        if key is None:
+            key = digest(path)
+            self.files[name] = [stat.st_mtime_ns, stat.st_size, key]
+            self.changed = True
+        return key
+
+    def _metadata(self, path: str, key: str) -> Metadata:
+        if self.maps[key] is None:
+            raise MapError('invalid map', path)
+        return Metadata(*self.maps[key])
+
+    def get(self, path: str, stat: Optional[os.stat_result] = None) -> Metadata:
+        """
+        Returns the metadata of the map, analysing it only if its content was never indexed
+        """
+        key = self._key(path, stat)
+        if key not in self.maps:
+            self.maps[key] = _describe(path)
+            self.changed = True
+        return self._metadata(path, key)
+
+    def cached(self, path: str, stat: Optional[os.stat_result] = None) -> Optional[Metadata]:
+        """
+        Returns the metadata of the map if its content was already indexed, else None without analysing it
+        """
+        key = self._key(path, stat)
+        if key in self.maps:
+            return self._metadata(path, key)
+
+    def store(self, path: str, metadata: Optional[Metadata]) -> None:
+        """
+        Records the metadata of the map, analysed elsewhere, None for an invalid map
+        """
+        self.maps[self._key(path, None)] = list(metadata) if metadata is not None else None
+        self.changed = True
+
+    def update(self, directory: str, workers: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Indexes every map of the directory, analysing the new contents on all the cores,
+        and forgets the removed files. Returns the number of files and of analysed maps
+        """
+        files, pending = {}, {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1] not in ('.txt', '.wiy') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                key = self._known(entry.name, stat) or digest(entry.path)
+                files[entry.name] = [stat.st_mtime_ns, stat.st_size, key]
+                if key not in self.maps:
+                    pending.setdefault(key, entry.path)
+
+        if pending:
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(pending) // (workers * 4))
+            with ProcessPoolExecutor(workers) as executor:
+                keys, paths = list(pending.keys()), list(pending.values())
+                for key, metadata in zip(keys, executor.map(_describe, paths, chunksize=chunksize)):
+                    self.maps[key] = metadata
+
+        used = {record[2] for record in files.values()}
+        self.changed = self.changed or files != self.files or used != set(self.maps)
+        self.files = files
+        self.maps = {key: value for key, value in self.maps.items() if key in used}
+        return len(files), len(pending)
+
+    def save(self) -> None:
+        """
+        Writes the index, if anything was indexed since it was loaded
+        """
+        if not self.changed:
+            return
+        temporary = f'{self.filename}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'files': self.files, 'maps': self.maps}, f, separators=(',', ':'))
+        os.replace(temporary, self.filename)
+        self.changed = False
+
+
+def _describe(path: str) -> Optional[List]:
+    try:
+        return list(describe(path))
+    except ValueError:
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m src.index', description='Indexes a directory of maps')
+    parser.add_argument('directory', nargs='?', default='assets/maps')
+    parser.add_argument('--index', default='assets/index.json', help='index file')
+    parser.add_argument('--workers', type=int, help='processes analysing the maps')
+    args = parser.parse_args()
+
+    index = MapIndex(args.index)
+    total, analysed = index.update(args.directory, args.workers)
+    index.save()
+    print(f'{total} maps indexed, {analysed} analysed')
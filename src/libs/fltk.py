@@ -1,7 +1,7 @@
 import subprocess
 import sys
 import tkinter as tk
-from collections import deque
+from collections import OrderedDict, deque
 from os import system
 from pathlib import Path
 from time import sleep, time
@@ -45,6 +45,7 @@ __all__ = [
     # gestion de fenêtre
     "cree_fenetre",
     "ferme_fenetre",
+    "a_la_fermeture",
     "redimensionne_fenetre",
     "mise_a_jour",
     # dessin
@@ -55,13 +56,20 @@ __all__ = [
     "cercle",
     "point",
     "image",
+    "precharge_image",
+    "cree_image",
     "texte",
     "taille_texte",
     # effacer
     "efface_tout",
     "efface",
+    "premier_plan",
+    # trames
+    "debut_trame",
+    "fin_trame",
     # utilitaires
     "attente",
+    "compteurs",
     "capture_ecran",
     "touche_pressee",
     "abscisse_souris",
@@ -71,6 +79,9 @@ __all__ = [
     # événements
     "donne_ev",
     "attend_ev",
+    "boucle_ev",
+    "arrete_boucle",
+    "minuteur",
     "attend_clic_gauche",
     "attend_fermeture",
     "type_ev",
@@ -80,6 +91,39 @@ __all__ = [
 ]
 
 
+# Compteurs d'activité, tenus seulement une fois activés avec ``compteurs``
+_compteurs: Optional[Dict[str, float]] = None
+
+
+def _compte(nom: str, n: float = 1) -> None:
+    if _compteurs is not None:
+        _compteurs[nom] = _compteurs.get(nom, 0) + n
+
+
+class _Canevas(tk.Canvas):
+    """
+    Canevas tkinter comptant les objets créés et effacés.
+    """
+
+    # toutes les méthodes create_* passent par _create
+    def _create(self, *args: Any) -> int:
+        if _compteurs is not None:
+            _compte("objets_crees")
+            _compte("appels_tcl")
+        return super()._create(*args)
+
+    def delete(self, *args: Any) -> None:
+        if _compteurs is not None:
+            _compte("objets_effaces", sum(len(self.find_withtag(arg)) for arg in args))
+            _compte("appels_tcl")
+        super().delete(*args)
+
+    def tag_raise(self, *args: Any) -> None:
+        if _compteurs is not None:
+            _compte("appels_tcl")
+        super().tag_raise(*args)
+
+
 class CustomCanvas:
     """
     Classe qui encapsule tous les objets tkinter nécessaires à la création
@@ -116,7 +160,7 @@ class CustomCanvas:
         self.root = tk.Tk()
 
         # canvas attached to the root object
-        self.canvas = tk.Canvas(
+        self.canvas = _Canevas(
             self.root, width=width, height=height, highlightthickness=0
         )
 
@@ -128,6 +172,10 @@ class CustomCanvas:
 
         # binding events
         self.ev_queue: Deque[FltkEvent] = deque()
+        # callback mode (see boucle_ev): events are handled as they arrive
+        self.callback: Optional[Callable[[FltkEvent], Any]] = None
+        self.dispatching = False
+        self.error: Optional[BaseException] = None
         self.pressed_keys: Set[str] = set()
         self.events = CustomCanvas._default_ev if events is None else events
         self.bind_events()
@@ -145,7 +193,9 @@ class CustomCanvas:
     def update(self) -> None:
         t = time()
         self.root.update()
-        sleep(max(0.0, self.interval - (t - self.last_update)))
+        pause = max(0.0, self.interval - (t - self.last_update))
+        _compte("attente_s", pause)
+        sleep(pause)
         self.last_update = time()
 
     def resize(self, width: int, height: int) -> None:
@@ -168,8 +218,28 @@ class CustomCanvas:
         if ev.keysym in self.pressed_keys:
             self.pressed_keys.remove(ev.keysym)
 
+    def push(self, ev: FltkEvent) -> None:
+        self.ev_queue.append(ev)
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        # a callback updating the window may receive events, which are
+        # queued and handled by the outer call
+        if self.callback is None or self.dispatching:
+            return
+        self.dispatching = True
+        try:
+            while self.ev_queue and self.callback is not None:
+                self.callback(self.ev_queue.popleft())
+        except BaseException as error:
+            self.error = error
+            self.callback = None
+            self.root.quit()
+        finally:
+            self.dispatching = False
+
     def event_quit(self) -> None:
-        self.ev_queue.append(("Quitte", None))
+        self.push(("Quitte", None))
 
     # noinspection PyUnresolvedReferences
     def event_resize(self, event: TkEvent) -> None:
@@ -177,13 +247,13 @@ class CustomCanvas:
             if self.width != event.width or self.height != event.height:
                 self.width, self.height = event.width, event.height
                 if not self.ev_queue or self.ev_queue[-1][0] != "Redimension":
-                    self.ev_queue.append(("Redimension", event))
+                    self.push(("Redimension", event))
 
     def bind_event(self, name: str) -> None:
         e_type = CustomCanvas._ev_mapping.get(name, name)
 
         def handler(event: TkEvent, _name: str = name) -> None:
-            self.ev_queue.append((_name, event))
+            self.push((_name, event))
 
         self.canvas.bind(e_type, handler, "+")
 
@@ -193,7 +263,22 @@ class CustomCanvas:
 
 
 __canevas: Optional[CustomCanvas] = None
-__img: Dict[Tuple[Path, int, int], PhotoImage] = {}
+# Commandes du canevas en attente de la fin de la trame, None hors d'une trame
+__trame: Optional[List[Tuple[Any, ...]]] = None
+# Liste recevant les commandes de la trame au lieu de la fenêtre
+__liste: Optional[List[Tuple[Any, ...]]] = None
+__profondeur = 0
+# Images décodées, par fichier, avec la date de modification du fichier lu
+__sources: "OrderedDict[Path, Tuple[int, Any]]" = OrderedDict()
+# Images redimensionnées, par fichier et dimensions demandées
+__img: "OrderedDict[Tuple[Path, Optional[int], Optional[int]], Tuple[int, PhotoImage]]" = OrderedDict()
+# Nombre maximal d'images gardées dans chacun des deux caches. Une image
+# retirée du cache alors qu'elle est encore affichée disparaît du canevas.
+TAILLE_CACHE_IMAGES = 256
+# Polices déjà construites, par famille et taille
+__polices: Dict[Tuple[str, int], Font] = {}
+# Fonctions appelées par ferme_fenetre, pour vider les caches liés à la fenêtre
+__a_la_fermeture: List[Callable[[], Any]] = []
 
 
 #############################################################################
@@ -218,7 +303,8 @@ Ret = TypeVar("Ret")
 
 def _fenetre_cree(func: Callable[..., Ret]) -> Callable[..., Ret]:
     def new_func(*args: Any, **kwargs: Any) -> Ret:
-        if __canevas is None:
+        # une trame rendue dans une liste n'a pas besoin de fenêtre
+        if __canevas is None and __liste is None:
             raise FenetreNonCree(
                 'La fenêtre n\'a pas été crée avec la fonction "cree_fenetre".'
             )
@@ -257,6 +343,23 @@ def ferme_fenetre() -> None:
     assert __canevas is not None
     __canevas.root.destroy()
     __canevas = None
+    # les polices et les images Tk appartiennent à la fenêtre détruite
+    __polices.clear()
+    __img.clear()
+    if not PIL_AVAILABLE:
+        __sources.clear()
+    for fonction in __a_la_fermeture:
+        fonction()
+
+
+def a_la_fermeture(fonction: Callable[[], Any]) -> None:
+    """
+    Enregistre une fonction à appeler par ``ferme_fenetre``, par exemple pour
+    vider un cache de mesures faites avec les polices de la fenêtre.
+
+    :param fonction: fonction sans argument
+    """
+    __a_la_fermeture.append(fonction)
 
 
 @_fenetre_cree
@@ -311,10 +414,7 @@ def ligne(
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_line(
-        ax, ay, bx, by, fill=couleur, width=epaisseur, tags=tag
-    )
+    return _cree("line", (ax, ay, bx, by), fill=couleur, width=epaisseur, tags=tag)
 
 
 @_fenetre_cree
@@ -350,10 +450,7 @@ def fleche(
         bx - x * 5 + 2 * y,
         by - 5 * y - 2 * x,
     ]
-    assert __canevas is not None
-    return __canevas.canvas.create_polygon(
-        points, fill=couleur, outline=couleur, width=epaisseur, tags=tag
-    )
+    return _cree("polygon", points, fill=couleur, outline=couleur, width=epaisseur, tags=tag)
 
 
 @_fenetre_cree
@@ -374,10 +471,7 @@ def polygone(
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_polygon(
-        points, fill=remplissage, outline=couleur, width=epaisseur, tags=tag
-    )
+    return _cree("polygon", points, fill=remplissage, outline=couleur, width=epaisseur, tags=tag)
 
 
 @_fenetre_cree
@@ -405,11 +499,8 @@ def rectangle(
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_rectangle(
-        ax, ay, bx, by,
-        outline=couleur, fill=remplissage, width=epaisseur, tags=tag
-    )
+    return _cree("rectangle", (ax, ay, bx, by),
+                 outline=couleur, fill=remplissage, width=epaisseur, tags=tag)
 
 
 @_fenetre_cree
@@ -434,17 +525,8 @@ def cercle(
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_oval(
-        x - r,
-        y - r,
-        x + r,
-        y + r,
-        outline=couleur,
-        fill=remplissage,
-        width=epaisseur,
-        tags=tag,
-    )
+    return _cree("oval", (x - r, y - r, x + r, y + r),
+                 outline=couleur, fill=remplissage, width=epaisseur, tags=tag)
 
 
 @_fenetre_cree
@@ -476,12 +558,9 @@ def arc(
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_arc(
-        x - r,
-        y - r,
-        x + r,
-        y + r,
+    return _cree(
+        "arc",
+        (x - r, y - r, x + r, y + r),
         extent=ouverture,
         start=depart,
         style=tk.ARC,
@@ -520,7 +599,7 @@ def point(
 def image(
         x: float,
         y: float,
-        fichier: str,
+        fichier: Union[str, PhotoImage],
         largeur: Optional[int] = None,
         hauteur: Optional[int] = None,
         ancrage: Anchor = "center",
@@ -531,35 +610,119 @@ def image(
     valeurs possibles du point d'ancrage sont ``'center'``, ``'nw'``,
     etc. Les arguments optionnels ``largeur`` et ``hauteur`` permettent de
     spécifier des dimensions maximales pour l'image (sans changement de
-    proportions).
+    proportions). ``fichier`` peut aussi être une image créée par
+    ``cree_image``, affichée telle quelle.
 
     :param largeur: largeur de l'image
     :param hauteur: hauteur de l'image
     :param float x: abscisse du point d'ancrage
     :param float y: ordonnée du point d'ancrage
-    :param str fichier: nom du fichier contenant l'image
+    :param fichier: nom du fichier contenant l'image, ou image
     :param ancrage: position du point d'ancrage par rapport à l'image
     :param str tag: étiquette d'objet (défaut : pas d'étiquette)
     :return: identificateur d'objet
     """
-    assert __canevas is not None
+    if isinstance(fichier, PhotoImage):
+        tk_image: Union[str, PhotoImage] = fichier
+    elif __liste is not None:
+        # sans fenêtre, l'image n'est pas chargée : la commande garde le fichier
+        tk_image = fichier
+    else:
+        tk_image = _charge_image(fichier, hauteur, largeur)
+    return _cree("image", (x, y), anchor=ancrage, image=tk_image, tags=tag)
+
+
+@_fenetre_cree
+def precharge_image(
+        fichier: str,
+        largeur: Optional[int] = None,
+        hauteur: Optional[int] = None,
+) -> None:
+    """
+    Charge à l'avance l'image contenue dans ``fichier`` aux dimensions
+    données, pour que les appels suivants à ``image`` n'aient ni à lire
+    le fichier, ni à redimensionner l'image.
+
+    :param str fichier: nom du fichier contenant l'image
+    :param largeur: largeur de l'image
+    :param hauteur: hauteur de l'image
+    """
+    _charge_image(fichier, hauteur, largeur)
+
+
+@_fenetre_cree
+def cree_image(
+        largeur: int,
+        hauteur: int,
+        rectangles: List[Tuple[float, float, float, float, str]],
+) -> PhotoImage:
+    """
+    Crée une image de dimensions ``largeur`` x ``hauteur`` pixels, composée
+    des rectangles ``(ax, ay, bx, by, couleur)`` peints dans l'ordre. L'image
+    peut ensuite être affichée autant de fois que voulu avec ``image``.
+
+    :param int largeur: largeur de l'image
+    :param int hauteur: hauteur de l'image
+    :param list rectangles: rectangles à peindre, coordonnées dans l'image
+    :return: image
+    """
+    ph_image = PhotoImage(width=largeur, height=hauteur)
+    for ax, ay, bx, by, couleur in rectangles:
+        ph_image.put(couleur, to=(round(ax), round(ay), round(bx), round(by)))
+    return ph_image
+
+
+def _cache_get(cache: "OrderedDict[Any, Tuple[int, Any]]",
+               cle: Any, date: int) -> Optional[Any]:
+    entree = cache.get(cle)
+    if entree is None or entree[0] != date:
+        return None
+    cache.move_to_end(cle)
+    return entree[1]
+
+
+def _cache_set(cache: "OrderedDict[Any, Tuple[int, Any]]",
+               cle: Any, date: int, valeur: Any) -> None:
+    cache[cle] = (date, valeur)
+    cache.move_to_end(cle)
+    while len(cache) > TAILLE_CACHE_IMAGES:
+        cache.popitem(last=False)
+
+
+def _charge_image(fichier: str,
+                  hauteur: Optional[int] = None,
+                  largeur: Optional[int] = None) -> PhotoImage:
+    chemin = Path(fichier)
+    # un fichier modifié depuis sa lecture est relu
+    date = chemin.stat().st_mtime_ns
+    ph_image = _cache_get(__img, (chemin, largeur, hauteur), date)
+    if ph_image is not None:
+        _compte("cache_images_succes")
+        return ph_image
+    _compte("cache_images_echecs")
+
+    source = _cache_get(__sources, chemin, date)
+    if source is None:
+        if PIL_AVAILABLE:
+            source = Image.open(fichier)
+            source.load()
+        else:
+            source = PhotoImage(file=fichier)
+        _cache_set(__sources, chemin, date, source)
+
     if PIL_AVAILABLE:
-        tk_image = _load_pil_image(fichier, hauteur, largeur)
+        ph_image = _load_pil_image(source, hauteur, largeur)
     else:
-        tk_image = _load_tk_image(fichier, hauteur, largeur)
-    img_object = __canevas.canvas.create_image(
-        x, y, anchor=ancrage, image=tk_image, tags=tag
-    )
-    return img_object
+        ph_image = _load_tk_image(source, hauteur, largeur)
+    _cache_set(__img, (chemin, largeur, hauteur), date, ph_image)
+    return ph_image
 
 
-def _load_tk_image(fichier: str,
+def _load_tk_image(source: PhotoImage,
                    hauteur: Optional[int] = None,
                    largeur: Optional[int] = None) -> PhotoImage:
-    chemin = Path(fichier)
-    ph_image = PhotoImage(file=fichier)
-    largeur_o = ph_image.width()
-    hauteur_o = ph_image.height()
+    largeur_o = source.width()
+    hauteur_o = source.height()
     if largeur is None:
         largeur = largeur_o
     if hauteur is None:
@@ -568,31 +731,20 @@ def _load_tk_image(fichier: str,
     zoom_h = max(1, hauteur // hauteur_o)
     red_l = max(1, largeur_o // largeur)
     red_h = max(1, hauteur_o // hauteur)
-    largeur = largeur_o * zoom_l // red_l
-    hauteur = hauteur_o * zoom_h // red_h
-    if (chemin, largeur, hauteur) in __img:
-        return __img[(chemin, largeur, hauteur)]
-    ph_image = ph_image.zoom(zoom_l, zoom_h)
+    ph_image = source.zoom(zoom_l, zoom_h)
     ph_image = ph_image.subsample(red_l, red_h)
-    __img[(chemin, largeur, hauteur)] = ph_image
     return ph_image
 
 
-def _load_pil_image(fichier: str,
+def _load_pil_image(source: Any,
                     hauteur: Optional[int] = None,
                     largeur: Optional[int] = None) -> PhotoImage:
-    chemin = Path(fichier)
-    img = Image.open(fichier)
     if largeur is None:
-        largeur = img.width
+        largeur = source.width
     if hauteur is None:
-        hauteur = img.height
-    if (chemin, largeur, hauteur) in __img:
-        return __img[(chemin, largeur, hauteur)]
-    img = img.resize((largeur, hauteur))
-    ph_image = ImageTk.PhotoImage(img)
-    __img[(chemin, largeur, hauteur)] = ph_image  # type:ignore
-    return ph_image  # type:ignore
+        hauteur = source.height
+    img = source.resize((largeur, hauteur))
+    return ImageTk.PhotoImage(img)  # type:ignore
 
 
 # Texte
@@ -623,12 +775,8 @@ def texte(
     :param tag: étiquette d'objet (défaut : pas d'étiquette
     :return: identificateur d'objet
     """
-    assert __canevas is not None
-    return __canevas.canvas.create_text(
-        x, y,
-        text=chaine, font=(police, taille),
-        tags=tag, fill=couleur, anchor=ancrage
-    )
+    return _cree("text", (x, y), text=chaine, font=(police, taille),
+                 tags=tag, fill=couleur, anchor=ancrage)
 
 
 def taille_texte(
@@ -644,11 +792,217 @@ def taille_texte(
     :return: couple (w, h) constitué de la largeur et la hauteur de la chaîne
         en pixels (int), dans la police et la taille données.
     """
-    font = Font(family=police, size=taille)
+    font = __polices.get((police, taille))
+    if font is None:
+        font = __polices[(police, taille)] = Font(family=police, size=taille)
     chaine = chaine.split('/n')
     return max([font.measure(line) for line in chaine]), font.metrics("linespace") * len(chaine)
 
 
+#############################################################################
+# Trames
+#############################################################################
+
+
+# Exécute une liste de commandes du canevas en un seul appel à Tcl
+_PROC_TRAME = """
+proc fltk_trame {canevas commandes} {
+    foreach commande $commandes {
+        $canevas {*}$commande
+    }
+}
+"""
+
+
+def _aplatit(valeurs: Any) -> Tuple[Any, ...]:
+    if isinstance(valeurs, (list, tuple)):
+        return tuple(v for valeur in valeurs for v in _aplatit(valeur))
+    return (valeurs,)
+
+
+def _cree(genre: str, coords: Any, **options: Any) -> int:
+    if __trame is not None:
+        commande: List[Any] = ["create", genre, *_aplatit(coords)]
+        for cle, valeur in options.items():
+            commande += ("-" + cle, valeur)
+        __trame.append(tuple(commande))
+        return 0
+    assert __canevas is not None
+    return getattr(__canevas.canvas, "create_" + genre)(*_aplatit(coords), **options)
+
+
+def _commande(*commande: Any) -> None:
+    if __trame is not None:
+        __trame.append(commande)
+        return
+    assert __canevas is not None
+    if commande[0] == "delete":
+        __canevas.canvas.delete(commande[1])
+    else:
+        __canevas.canvas.tag_raise(commande[1])
+
+
+def _options(commande: Tuple[Any, ...], debut: int) -> Dict[str, Any]:
+    return dict(zip(commande[debut::2], commande[debut + 1::2]))
+
+
+def _marge(commande: Tuple[Any, ...]) -> float:
+    # demi-épaisseur du contour d'un rectangle, nulle sans couleur ou sans épaisseur
+    options = _options(commande, 6)
+    return float(options.get("-width", 1)) / 2 if options.get("-outline") else 0
+
+
+def _coins(commande: Tuple[Any, ...]) -> Tuple[Any, Any, Any, Any]:
+    # coins haut gauche et bas droit d'un rectangle, donné par deux coins opposés
+    x1, x2 = sorted((commande[2], commande[4]))
+    y1, y2 = sorted((commande[3], commande[5]))
+    return x1, y1, x2, y2
+
+
+Boite = Tuple[float, float, float, float]
+# Côté en pixels des cases de l'index des rectangles pleins
+_CASE = 64
+# Un rectangle plein couvrant plus de cases est rangé à part
+_CASES_MAX = 64
+
+
+class _Pleins:
+    """
+    Rectangles pleins d'une même étiquette, rangés dans les cases d'une
+    grille qu'ils touchent : un rectangle qui en cache un autre contient son
+    coin haut gauche, il suffit donc de chercher dans la case de ce coin.
+    """
+
+    def __init__(self) -> None:
+        self.cases: Dict[Tuple[int, int], List[Boite]] = {}
+        self.grands: List[Boite] = []
+
+    def ajoute(self, boite: Boite) -> None:
+        x1, y1, x2, y2 = (int(v // _CASE) for v in boite)
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > _CASES_MAX:
+            self.grands.append(boite)
+            return
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                self.cases.setdefault((x, y), []).append(boite)
+
+    def cache(self, boite: Boite) -> bool:
+        x1, y1, x2, y2 = boite
+        case = (int(x1 // _CASE), int(y1 // _CASE))
+        for liste in (self.cases.get(case, ()), self.grands):
+            for bx1, by1, bx2, by2 in liste:
+                if bx1 <= x1 and by1 <= y1 and x2 <= bx2 and y2 <= by2:
+                    return True
+        return False
+
+
+def _optimise(commandes: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    """
+    Retire les rectangles cachés par un rectangle plein dessiné après eux
+    avec les mêmes étiquettes, puis fusionne les rectangles consécutifs de
+    même style qui forment ensemble un rectangle.
+    """
+    # en partant de la fin, les rectangles pleins déjà vus cachent les précédents
+    pleins: Dict[Any, _Pleins] = {}
+    gardees: List[Tuple[Any, ...]] = []
+    for commande in reversed(commandes):
+        if commande[0] == "create" and commande[1] == "rectangle":
+            options = _options(commande, 6)
+            cle = options.get("-tags", "")
+            # rectangle touché, contour compris
+            marge = _marge(commande)
+            x1, y1, x2, y2 = _coins(commande)
+            boite = (x1 - marge, y1 - marge, x2 + marge, y2 + marge)
+            if cle in pleins and pleins[cle].cache(boite):
+                continue
+            if options.get("-fill"):
+                pleins.setdefault(cle, _Pleins()).ajoute(boite)
+        elif commande[0] in ("delete", "raise"):
+            # l'ordre d'affichage peut changer : les rectangles suivants ne cachent plus rien
+            pleins.clear()
+        gardees.append(commande)
+    gardees.reverse()
+
+    fusionnees: List[Tuple[Any, ...]] = []
+    for commande in gardees:
+        precedente = fusionnees[-1] if fusionnees else None
+        if (precedente is not None and commande[:2] == ("create", "rectangle") == precedente[:2]
+                and commande[6:] == precedente[6:] and not _marge(commande)):
+            ax1, ay1, ax2, ay2 = _coins(precedente)
+            bx1, by1, bx2, by2 = _coins(commande)
+            if (ay1, ay2) == (by1, by2) and (ax2 == bx1 or bx2 == ax1):
+                fusionnees[-1] = ("create", "rectangle", min(ax1, bx1), ay1, max(ax2, bx2), ay2) + commande[6:]
+                continue
+            if (ax1, ax2) == (bx1, bx2) and (ay2 == by1 or by2 == ay1):
+                fusionnees[-1] = ("create", "rectangle", ax1, min(ay1, by1), ax2, max(ay2, by2)) + commande[6:]
+                continue
+        if commande == precedente:
+            continue
+        fusionnees.append(commande)
+    return fusionnees
+
+
+def debut_trame(liste: Optional[List[Tuple[Any, ...]]] = None) -> None:
+    """
+    Commence une trame : jusqu'à ``fin_trame``, les dessins et les
+    effacements sont mis en attente, et les fonctions de dessin renvoient 0
+    au lieu d'un identificateur d'objet. Avec ``liste``, les commandes de la
+    trame y sont ajoutées au lieu d'être envoyées à la fenêtre, qui n'a alors
+    pas besoin d'exister. Les trames imbriquées font partie de la trame
+    englobante.
+
+    :param liste: liste recevant les commandes, sous la forme de tuples
+        d'arguments d'un canevas Tcl, par exemple
+        ``('create', 'rectangle', 0, 0, 10, 10, '-outline', 'black', ...)``
+    """
+    global __trame, __liste, __profondeur
+    if __canevas is None and liste is None and __profondeur == 0:
+        raise FenetreNonCree(
+            'La fenêtre n\'a pas été crée avec la fonction "cree_fenetre".'
+        )
+    __profondeur += 1
+    if __profondeur == 1:
+        __trame = []
+        __liste = liste
+
+
+def fin_trame() -> None:
+    """
+    Termine la trame commencée par ``debut_trame``, et envoie ses commandes
+    à la fenêtre en un seul appel, après avoir retiré les rectangles cachés
+    et fusionné les rectangles voisins de même style.
+    """
+    global __trame, __liste, __profondeur
+    __profondeur -= 1
+    if __profondeur > 0 or __trame is None:
+        return
+    commandes, liste = _optimise(__trame), __liste
+    __trame, __liste = None, None
+
+    if liste is not None:
+        liste.extend(commandes)
+        return
+    if not commandes:
+        return
+    assert __canevas is not None
+    canevas = __canevas.canvas
+    interprete = __canevas.root.tk
+    if not interprete.call("info", "procs", "fltk_trame"):
+        interprete.eval(_PROC_TRAME)
+    crees = sum(commande[0] == "create" for commande in commandes)
+    if _compteurs is not None:
+        # les effacements passent par Tcl : ils se déduisent du nombre
+        # d'objets avant et après la trame
+        compte = f"llength [{canevas._w} find all]"
+        avant = int(interprete.eval(compte))
+        interprete.call("fltk_trame", canevas._w, tuple(commandes))
+        _compte("objets_effaces", avant + crees - int(interprete.eval(compte)))
+    else:
+        interprete.call("fltk_trame", canevas._w, tuple(commandes))
+    _compte("appels_tcl")
+    _compte("objets_crees", crees)
+
+
 #############################################################################
 # Effacer
 #############################################################################
@@ -659,8 +1013,7 @@ def efface_tout() -> None:
     """
     Efface la fenêtre.
     """
-    assert __canevas is not None
-    __canevas.canvas.delete("all")
+    _commande("delete", "all")
 
 
 @_fenetre_cree
@@ -671,8 +1024,18 @@ def efface(objet_ou_tag: Union[int, str]) -> None:
     :param: objet ou étiquette d'objet à supprimer
     :type: ``int`` ou ``str``
     """
-    assert __canevas is not None
-    __canevas.canvas.delete(objet_ou_tag)
+    _commande("delete", objet_ou_tag)
+
+
+@_fenetre_cree
+def premier_plan(objet_ou_tag: Union[int, str]) -> None:
+    """
+    Place ``objet`` au-dessus de tous les autres objets de la fenêtre.
+
+    :param: objet ou étiquette des objets à placer au premier plan
+    :type: ``int`` ou ``str``
+    """
+    _commande("raise", objet_ou_tag)
 
 
 #############################################################################
@@ -686,6 +1049,20 @@ def attente(temps: float) -> None:
         mise_a_jour()
 
 
+def compteurs(actifs: Optional[Dict[str, float]] = None) -> Optional[Dict[str, float]]:
+    """
+    Compte dans le dictionnaire ``actifs`` les objets créés et effacés,
+    les succès et les échecs du cache d'images, et le temps passé à dormir
+    dans ``mise_a_jour``. Avec ``None``, le comptage est désactivé.
+
+    :param actifs: dictionnaire des compteurs, ou ``None``
+    :return: le dictionnaire des compteurs précédent
+    """
+    global _compteurs
+    precedents, _compteurs = _compteurs, actifs
+    return precedents
+
+
 @_fenetre_cree
 def capture_ecran(file: str) -> None:
     """
@@ -745,6 +1122,55 @@ def attend_ev() -> FltkEvent:
         mise_a_jour()
 
 
+@_fenetre_cree
+def boucle_ev(traitement: Callable[[FltkEvent], Any]) -> None:
+    """
+    Appelle ``traitement`` sur chaque événement dès qu'il se produit, jusqu'à
+    l'appel de ``arrete_boucle``. Entre deux événements, le programme dort
+    dans la boucle d'événements de tkinter, sans consommer de temps
+    processeur. Une exception levée par ``traitement`` arrête la boucle et
+    est propagée.
+
+    :param traitement: fonction appelée avec chaque événement
+    """
+    canevas = __canevas
+    assert canevas is not None
+    canevas.callback = traitement
+    canevas.error = None
+    try:
+        canevas.dispatch()
+        if canevas.callback is not None:
+            canevas.root.mainloop()
+    finally:
+        canevas.callback = None
+    if canevas.error is not None:
+        error, canevas.error = canevas.error, None
+        raise error
+
+
+@_fenetre_cree
+def arrete_boucle() -> None:
+    """
+    Arrête la boucle lancée par ``boucle_ev``, après le traitement de
+    l'événement en cours.
+    """
+    assert __canevas is not None
+    __canevas.callback = None
+    __canevas.root.quit()
+
+
+@_fenetre_cree
+def minuteur(delai: float) -> None:
+    """
+    Produit un événement de type 'Minuteur' dans ``delai`` secondes.
+
+    :param float delai: délai en secondes
+    """
+    canevas = __canevas
+    assert canevas is not None
+    canevas.root.after(int(delai * 1000), canevas.push, ("Minuteur", None))
+
+
 def attend_clic_gauche() -> Tuple[int, int]:
     """Attend qu'un clic gauche sur la fenêtre ait lieu et renvoie ses
     coordonnées. **Attention**, cette fonction empêche la détection d'autres
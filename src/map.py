@@ -1,29 +1,182 @@
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
 from src.utils import State, TextButton
 from src.libs import fltk as tk
+from src.binmap import load
+from src.engine import MapError
+from src.index import MapIndex, Metadata, describe
+
+
+def scan(directory: str, pattern: str = '') -> Iterator[os.DirEntry]:
+    """
+    Lazily yields the map files of the directory whose name contains the pattern
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension in ('.txt', '.wiy') and pattern in name.lower() and entry.is_file():
+                yield entry
 
 
 class MapHandler(TextButton):
+    def __init__(self, x: int, y: int, width: int, height: int, text: str, path: str = None):
+        super().__init__(x, y, width, height, text)
+        self.path = path
+
     def on_click(self):
+        if self.path is None:
+            return
         from src.game import Game
         with State.proxy as storage:
-            storage['map'] = self.text
+            storage['map'] = self.path
         State.change_state(Game())
 
 
+class PageHandler(TextButton):
+    def __init__(self, x: int, y: int, width: int, height: int, text: str, action: Callable[[], None]):
+        super().__init__(x, y, width, height, text)
+        self.action = action
+
+    def on_click(self):
+        self.action()
+
+
 class Map(State):
+    directory = 'assets/maps'
+    page_size = 7
+
+    # Seconds between two checks of the maps analysed in the background
+    poll_delay = 0.2
+
     def __init__(self):
-        names = [name.split('.')[0] for name in os.listdir('assets/maps')]
-        self.dy = 440 // len(names)
-        self.maps = [MapHandler(120, int((index + 0.5) * self.dy), 200, int(self.dy * 0.8), name) for index, name in enumerate(names)]
+        super().__init__()
+        self.index = MapIndex('assets/index.json')
+        self.pattern = ''
+        # Maps never indexed are played in a background thread, so that drawing a page stays quick
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.analyses: Dict[str, Future] = {}
+        self.polling = False
+        self.rescan()
+
+    def rescan(self):
+        """
+        Restarts the scan of the directory with the current filter
+        """
+        self.scanner = scan(self.directory, self.pattern)
+        self.found: List[os.DirEntry] = []
+        self.page = 0
+
+    def fetch(self, count: int):
+        """
+        Scans the directory until count maps are found, or there are no more
+        """
+        while len(self.found) < count:
+            entry = next(self.scanner, None)
+            if entry is None:
+                return
+            self.found.append(entry)
+
+    def turn(self, step: int):
+        self.page += step
+        self.draw()
+
+    def draw(self):
+        """
+        Builds and draws the buttons of the current page only
+        """
+        tk.efface_tout()
+        self.widgets.clear()
+
+        start = self.page * self.page_size
+        self.fetch(start + self.page_size + 1)
+        for row, entry in enumerate(self.found[start:start + self.page_size]):
+            name = os.path.splitext(entry.name)[0]
+            try:
+                metadata = self.index.cached(entry.path, entry.stat())
+                if metadata is not None:
+                    winnable = 'winnable' if metadata.result == 'win' else 'needs rotations'
+                    text = f'{name}\n{metadata.width}x{metadata.height}, {metadata.dragons} dragons, {winnable}'
+                else:
+                    # Only what loading tells, until the game is played in the background
+                    dungeon = load(entry.path)
+                    text = f'{name}\n{dungeon.width}x{dungeon.height}, {len(dungeon.dragons)} dragons, analysing...'
+                    self.analyse(entry.path)
+                path = entry.path
+            except (OSError, MapError):
+                text, path = f'{name}\ninvalid map', None
+            self.widgets.add(MapHandler(360, 70 + row * 55, 400, 50, text, path)).draw()
+
+        if self.page > 0:
+            self.widgets.add(PageHandler(200, 450, 80, 40, '<', lambda: self.turn(-1))).draw()
+        if len(self.found) > start + self.page_size:
+            self.widgets.add(PageHandler(520, 450, 80, 40, '>', lambda: self.turn(1))).draw()
+        tk.texte(360, 450, f'page {self.page + 1}', '#000000', 'center', 'monogramextended', 24)
+        tk.texte(360, 20, f'filter: {self.pattern}_', '#000000', 'center', 'monogramextended', 24)
+
+    def analyse(self, path: str):
+        """
+        Plays the map in the background, once, and checks for the result later
+        """
+        if path in self.analyses:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(1)
+        self.analyses[path] = self.executor.submit(describe, path)
+        if not self.polling:
+            self.polling = True
+            tk.minuteur(self.poll_delay)
+
+    def poll(self):
+        """
+        Indexes the maps analysed since the last check, and redraws the page if there were any
+        """
+        self.polling = False
+        done = [path for path, future in self.analyses.items() if future.done()]
+        for path in done:
+            try:
+                metadata: Optional[Metadata] = self.analyses.pop(path).result()
+            except ValueError:
+                metadata = None
+            try:
+                self.index.store(path, metadata)
+            except OSError:
+                # removed while it was played
+                pass
+        if done:
+            self.draw()
+        if self.analyses and not self.polling:
+            self.polling = True
+            tk.minuteur(self.poll_delay)
 
     def on_enter(self):
-        for button in self.maps:
-            button.draw()
+        self.draw()
 
     def on_event(self, ev: tk.FltkEvent):
         super().on_event(ev)
-        if tk.type_ev(ev) in ('ClicGauche', 'ClicDroit'):
-            x, y = tk.abscisse(ev), tk.ordonnee(ev)
-            for button in self.maps:
-                button.click(x, y)
+        if State.current is not self:
+            return
+        if tk.type_ev(ev) == 'Minuteur':
+            self.poll()
+            return
+        if tk.type_ev(ev) != 'Touche':
+            return
+        key = tk.touche(ev)
+        if key in ('Left', 'Prior') and self.page > 0:
+            self.turn(-1)
+        elif key in ('Right', 'Next') and len(self.found) > (self.page + 1) * self.page_size:
+            self.turn(1)
+        elif key == 'BackSpace' and self.pattern:
+            self.pattern = self.pattern[:-1]
+            self.rescan()
+            self.draw()
+        elif len(key) == 1 and key.isalnum():
+            self.pattern += key.lower()
+            self.rescan()
+            self.draw()
+
+    def on_exit(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.index.save()
+        super().on_exit()
@@ -10,6 +10,7 @@ class Handler(TextButton):
 
 class Over(State):
     def __init__(self):
+        super().__init__()
         with self.proxy as storage:
             result = storage['result']
 
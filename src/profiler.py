@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter_ns
+from typing import ContextManager, Deque, Dict, Optional
+
+from src.libs import fltk as tk
+
+
+__all__ = [
+    'enable',
+    'disable',
+    'span',
+    'report',
+    'dump',
+    'dump_trace',
+    'save',
+    'from_environment'
+]
+
+
+# Histogram of the durations of every span, by name: count, total and maximum in nanoseconds, then
+# power of two buckets in microseconds, bucket n counting the spans of less than 2 ** n us
+_spans: Dict[str, list] = {}
+# Last complete events of a Chrome trace, bounded so that long sessions do not grow the memory
+_trace: Deque[dict] = deque(maxlen=100000)
+_counters: Dict[str, float] = {}
+_enabled = False
+_start = 0
+# Returned when disabled: entering and exiting it does nothing
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ('name', 'begin')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.begin = perf_counter_ns()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = perf_counter_ns()
+        duration = end - self.begin
+        stats = _spans.get(self.name)
+        if stats is None:
+            stats = _spans[self.name] = [0, 0, 0, {}]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+        bucket = (duration // 1000).bit_length()
+        stats[3][bucket] = stats[3].get(bucket, 0) + 1
+        _trace.append({
+            'name': self.name,
+            'ph': 'X',
+            'ts': (self.begin - _start) / 1000,
+            'dur': (end - self.begin) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        })
+
+
+def enable() -> None:
+    """
+    Starts recording the spans, and counting the fltk canvas items and image cache accesses
+    """
+    global _enabled, _start
+    _enabled = True
+    _start = perf_counter_ns()
+    tk.compteurs(_counters)
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+    tk.compteurs(None)
+
+
+def span(name: str) -> ContextManager:
+    """
+    Returns a context timing its body under the given name, which does nothing when disabled
+    """
+    return _Span(name) if _enabled else _NOOP
+
+
+def _percentile(count: int, buckets: Dict[int, int], fraction: float) -> float:
+    # Upper bound in milliseconds of the bucket holding the given fraction of the spans
+    seen = 0
+    for bucket, number in sorted(buckets.items()):
+        seen += number
+        if seen >= count * fraction:
+            return 2 ** bucket / 1000
+    return 0.0
+
+
+def _histogram(count: int, total: int, longest: int, buckets: Dict[int, int]) -> dict:
+    return {
+        'count': count,
+        'total_ms': total / 1e6,
+        'mean_ms': total / count / 1e6,
+        'p50_ms': _percentile(count, buckets, 0.5),
+        'p95_ms': _percentile(count, buckets, 0.95),
+        'max_ms': longest / 1e6,
+        'buckets_us': {f'<{2 ** bucket}': number for bucket, number in sorted(buckets.items())},
+    }
+
+
+def report() -> dict:
+    """
+    Returns the histograms of the spans, the percentiles being bucket bounds, and the counters
+    """
+    return {
+        'spans': {name: _histogram(*stats) for name, stats in sorted(_spans.items())},
+        'counters': dict(_counters),
+    }
+
+
+def dump(filename: str) -> None:
+    """
+    Writes the report as JSON
+    """
+    with open(filename, 'w') as f:
+        json.dump(report(), f, indent=2)
+
+
+def dump_trace(filename: str) -> None:
+    """
+    Writes the last spans as a Chrome trace, to open in chrome://tracing or Perfetto
+    """
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': list(_trace), 'displayTimeUnit': 'ms'}, f)
+
+
+def save(filename: str) -> None:
+    """
+    Writes a Chrome trace if the filename ends with .trace.json, else the report
+    """
+    if filename.endswith('.trace.json'):
+        dump_trace(filename)
+    else:
+        dump(filename)
+
+
+def from_environment() -> Optional[str]:
+    """
+    Enables the profiler if the WIY_PROFILE variable names a report file, and returns it
+    """
+    filename = os.environ.get('WIY_PROFILE')
+    if filename:
+        enable()
+    return filename
@@ -0,0 +1,151 @@
+import os
+import struct
+import sys
+from time import perf_counter
+from typing import BinaryIO, List, Optional, Tuple
+
+from src.binmap import load
+from src.engine import Dungeon
+from src.headless import TURN, RIGHT, LEFT, Action
+from src.history import UNDO, History
+
+
+__all__ = [
+    'Recorder',
+    'Replay',
+    'read',
+    'step',
+    'new_file'
+]
+
+
+# Layout: magic, length of the map path, the UTF-8 map path, then one record per action, appended
+# as the game is played: the kind of the action, and the index of the rotated room (0 otherwise)
+MAGIC = b'WIYR'
+HEADER = struct.Struct('<4sH')
+RECORD = struct.Struct('<BI')
+KINDS = (TURN, RIGHT, LEFT, UNDO)
+
+Record = Tuple[int, int]
+
+
+class Recorder:
+    """
+    Appends the actions of a game to a replay file, creating it with its header if needed
+    """
+
+    def __init__(self, filename: str, map_path: str):
+        self.file: BinaryIO = open(filename, 'ab')
+        if self.file.tell() == 0:
+            path = map_path.encode('utf-8')
+            self.file.write(HEADER.pack(MAGIC, len(path)) + path)
+            self.file.flush()
+
+    def record(self, action: Action, width: int) -> None:
+        """
+        Appends the action, a headless one, of a dungeon of the given width.
+        Every record is flushed, so that a crash does not lose the moves leading to it
+        """
+        index = action[2] * width + action[1] if action[0] in (RIGHT, LEFT) else 0
+        self.file.write(RECORD.pack(KINDS.index(action[0]), index))
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def read(filename: str) -> Tuple[str, List[Record]]:
+    """
+    Returns the map path and the (kind, room index) records of a replay file.
+    A record cut by a crash is ignored
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{filename}: not a replay')
+    _, length = HEADER.unpack_from(data)
+    start = HEADER.size + length
+    end = start + (len(data) - start) // RECORD.size * RECORD.size
+    return data[HEADER.size:start].decode('utf-8'), list(RECORD.iter_unpack(data[start:end]))
+
+
+def step(dungeon: Dungeon, kind: int, index: int) -> bool:
+    """
+    Applies a turn or a rotation record to the dungeon. Returns True, if the game is over
+    """
+    if kind == 0:
+        return dungeon.update_dungeon()
+    value = dungeon.grid[index]
+    if kind == 1:
+        dungeon.set_mask(index, (value << 1) & 0xF | (value >> 3))
+    else:
+        dungeon.set_mask(index, (value >> 1) | (value << 3) & 0xF)
+    return False
+
+
+class Replay:
+    """
+    Replays a recorded game headlessly. A copy of the dungeon and of its undo history is kept every
+    few records, so that seeking only replays the records since the closest one
+    """
+
+    def __init__(self, filename: str, every: int = 1000, map_path: Optional[str] = None):
+        path, self.records = read(filename)
+        self.every = every
+        # Checkpoints[n] is the dungeon, and the deltas of its history, after n * every records
+        self.checkpoints: List[Tuple[Dungeon, tuple]] = [(load(map_path or path), ())]
+
+    def __len__(self):
+        return len(self.records)
+
+    def seek(self, position: int) -> Dungeon:
+        """
+        Returns a new dungeon, in the state after the given number of records
+        """
+        position = max(0, min(position, len(self.records)))
+        slot = min(position // self.every, len(self.checkpoints) - 1)
+        checkpoint, deltas = self.checkpoints[slot]
+        dungeon = checkpoint.copy()
+        # Undoing replays the history of the game, so that it is bounded in the same way
+        history = History(dungeon)
+        history.deltas.extend(deltas)
+        width = dungeon.width
+
+        for done in range(slot * self.every, position):
+            kind, index = self.records[done]
+            if KINDS[kind] == UNDO:
+                history.undo()
+            else:
+                history.record((KINDS[kind], index % width, index // width))
+                if step(dungeon, kind, index):
+                    break
+            if (done + 1) % self.every == 0 and (done + 1) // self.every == len(self.checkpoints):
+                self.checkpoints.append((dungeon.copy(), tuple(history.deltas)))
+        return dungeon
+
+    def play(self) -> Dungeon:
+        """
+        Returns the dungeon at the end of the game
+        """
+        return self.seek(len(self.records))
+
+
+def new_file(directory: str = 'replays') -> str:
+    """
+    Returns a new replay filename in the directory, which is created if needed
+    """
+    os.makedirs(directory, exist_ok=True)
+    number = len(os.listdir(directory))
+    while os.path.exists(os.path.join(directory, f'replay{number}.wiyr')):
+        number += 1
+    return os.path.join(directory, f'replay{number}.wiyr')
+
+
+if __name__ == '__main__':
+    for replay_file in sys.argv[1:]:
+        start = perf_counter()
+        replay = Replay(replay_file)
+        dungeon = replay.play()
+        result = 'win' if dungeon.player.alive and not any(d.alive for d in dungeon.dragons) else \
+            'loss' if not dungeon.player.alive else 'unfinished'
+        print(f'{replay_file}: {result} after {len(replay)} records, {(perf_counter() - start) * 1000:.1f} ms')
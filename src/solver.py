@@ -0,0 +1,237 @@
+import heapq
+from typing import List, Optional, Set, Tuple
+
+from src.engine import Dungeon, Entity
+from src.headless import TURN, RIGHT, LEFT, Action
+
+
+__all__ = [
+    'Solver',
+    'solve'
+]
+
+
+# Clicks needed to turn a room right by 0, 1, 2 or 3 quarters: three quarters is one left rotation
+CLICKS = (0, 1, 2, 1)
+# Door bit towards each side, and the side of the neighbor facing it
+SIDES = (1, 2, 4, 8)
+OPPOSITE = {1: 4, 2: 8, 4: 1, 8: 2}
+
+
+def turned(mask: int, quarters: int) -> int:
+    """
+    Returns the door mask turned right by the given number of quarters
+    """
+    for _ in range(quarters):
+        mask = (mask << 1) & 0xF | (mask >> 3)
+    return mask
+
+
+class _Exhausted(Exception):
+    pass
+
+
+class Solver:
+    """
+    Plans the game one fight at a time. For the next fight, the knight is given the cheapest route
+    to a dragon it can beat, then the rooms on or around the path it actually takes are rotated,
+    by iterative deepening, until the walk ends with a won fight. The explored states are
+    remembered, in a table of bounded size, with the budget they were explored with
+    """
+
+    def __init__(self, dungeon: Dungeon, max_cuts: int = 3, max_nodes: int = 20000, table_size: int = 1 << 16):
+        self.dungeon = dungeon
+        self.max_cuts = max_cuts
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        # Transposition table with a bounded memory: the slot of a state hash holds the hash and
+        # the budget of a search from it which found nothing, a new entry replacing the old one
+        self.table: List[Optional[Tuple[int, int]]] = [None] * table_size
+
+    def rotate(self, index: int, quarters: int) -> List[Action]:
+        """
+        Turns the room right by the given number of quarters, returns the matching clicks
+        """
+        x, y = index % self.dungeon.width, index // self.dungeon.width
+        room = self.dungeon.room(x, y)
+        for _ in range(quarters % 4):
+            room.rotate_right()
+        if quarters % 4 == 3:
+            return [(LEFT, x, y)]
+        return [(RIGHT, x, y)] * (quarters % 4)
+
+    def fight(self) -> Optional[List[Action]]:
+        """
+        Lets the knight walk to its target. Returns the turns if it wins the first fight, else
+        puts the knight back and returns None. A walk longer than the number of rooms never
+        reaches a fight: the knight goes back and forth between two targets of equal priority
+        """
+        dungeon = self.dungeon
+        snapshot = dungeon.snapshot()
+        alive = len([ent for ent in dungeon.entities if ent.alive])
+        turns = []
+        while len(turns) < dungeon.width * dungeon.height and dungeon.path() is not None:
+            turns.append((TURN,))
+            over = dungeon.update_dungeon()
+            if not dungeon.player.alive:
+                break
+            if over or len([ent for ent in dungeon.entities if ent.alive]) < alive:
+                return turns
+        dungeon.restore(snapshot)
+
+    def route(self, target: Entity) -> Optional[List[Tuple[int, int]]]:
+        """
+        Returns the rotations, as (room, quarters) pairs, opening the path to the target which
+        needs the fewest clicks. None, if no rotation can open any
+        """
+        dungeon = self.dungeon
+        width, height, grid = dungeon.width, dungeon.height, dungeon.grid
+        start = dungeon.player.y * width + dungeon.player.x
+        goal = target.y * width + target.x
+
+        def cost(index: int, doors: int) -> Tuple[int, int]:
+            best = None
+            for quarters in range(4):
+                if turned(grid[index], quarters) & doors == doors:
+                    if best is None or CLICKS[quarters] < best[0]:
+                        best = (CLICKS[quarters], quarters)
+            return best
+
+        # Dijkstra over (room, side it is entered from), the doors of a room being fixed when leaving it
+        heap = [(0, start, 0)]
+        parents = {(start, 0): None}
+        done = set()
+        while heap:
+            clicks, index, entry = heapq.heappop(heap)
+            if (index, entry) in done:
+                continue
+            done.add((index, entry))
+
+            if index == goal:
+                last = cost(index, entry)
+                if last is None:
+                    continue
+                rotations = [(index, last[1])]
+                node = parents[(index, entry)]
+                while node is not None:
+                    rotations.append(node[2])
+                    node = parents[node[:2]]
+                return [rotation for rotation in rotations if rotation[1]]
+
+            x, y = index % width, index // width
+            for side in SIDES:
+                if side == entry:
+                    continue
+                if side == 1 and y == 0 or side == 2 and x == width - 1 \
+                        or side == 4 and y == height - 1 or side == 8 and x == 0:
+                    continue
+                step = cost(index, entry | side)
+                if step is None:
+                    continue
+                neighbor = index + {1: -width, 2: 1, 4: width, 8: -1}[side]
+                state = (neighbor, OPPOSITE[side])
+                if state in done or state in parents and parents[state][3] <= clicks + step[0]:
+                    continue
+                parents[state] = (index, entry, (index, step[1]), clicks + step[0])
+                heapq.heappush(heap, (clicks + step[0], neighbor, OPPOSITE[side]))
+
+    def candidates(self) -> List[int]:
+        """
+        Returns the rooms worth rotating: the rooms on the path the knight takes, and their neighbors
+        """
+        dungeon = self.dungeon
+        width, height = dungeon.width, dungeon.height
+        path = dungeon.path()
+        rooms: Set[int] = set()
+        for room in path or [dungeon.player.room]:
+            rooms.add(room.index)
+            if room.y > 0:
+                rooms.add(room.index - width)
+            if room.x < width - 1:
+                rooms.add(room.index + 1)
+            if room.y < height - 1:
+                rooms.add(room.index + width)
+            if room.x > 0:
+                rooms.add(room.index - 1)
+        return sorted(rooms)
+
+    def cut(self, budget: int) -> Optional[List[Action]]:
+        """
+        Depth-first search of rotations, spending at most the given clicks, after which the knight
+        wins its next fight
+        """
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _Exhausted
+
+        turns = self.fight()
+        if turns is not None:
+            return turns
+        if budget == 0:
+            return
+
+        key = self.dungeon.state_hash
+        slot = key % len(self.table)
+        entry = self.table[slot]
+        if entry is not None and entry[0] == key and entry[1] >= budget:
+            return
+
+        for index in self.candidates():
+            clicks = []
+            for quarters in range(1, 4):
+                clicks += self.rotate(index, 1)
+                actions = clicks if quarters != 3 else [(LEFT, index % self.dungeon.width, index // self.dungeon.width)]
+                if len(actions) <= budget:
+                    plan = self.cut(budget - len(actions))
+                    if plan is not None:
+                        return actions + plan
+            self.rotate(index, 1)
+
+        self.table[slot] = (key, budget)
+
+    def step(self) -> Optional[List[Action]]:
+        """
+        Returns the actions leading to the next won fight, and plays them
+        """
+        turns = self.fight()
+        if turns is not None:
+            return turns
+
+        player = self.dungeon.player
+        targets = [ent for ent in self.dungeon.entities if ent.symbol != 'A' and ent.alive and ent.level <= player.level]
+        for target in sorted(targets, key=lambda ent: ent.priority, reverse=True):
+            route = self.route(target)
+            if route is None:
+                continue
+            actions = []
+            for index, quarters in route:
+                actions += self.rotate(index, quarters)
+            for budget in range(self.max_cuts + 1):
+                plan = self.cut(budget)
+                if plan is not None:
+                    return actions + plan
+            for index, quarters in route:
+                self.rotate(index, 4 - quarters)
+
+    def solve(self) -> Optional[List[Action]]:
+        """
+        Returns a winning plan, as a script of actions for the headless runner, or None
+        """
+        plan = []
+        try:
+            while self.dungeon.player.alive and any(dragon.alive for dragon in self.dungeon.dragons):
+                actions = self.step()
+                if actions is None:
+                    return
+                plan += actions
+        except _Exhausted:
+            return
+        return plan
+
+
+def solve(dungeon: Dungeon, max_cuts: int = 3, max_nodes: int = 20000) -> Optional[List[Action]]:
+    """
+    Returns a plan winning the game, or None if none was found within the limits.
+    The dungeon is left untouched
+    """
+    return Solver(dungeon.copy(), max_cuts, max_nodes).solve()
@@ -1,2 +1,3 @@
 from src.utils.fsm import State
 from src.utils.button import TextButton, ImageButton
+from src.utils.hitgrid import HitGrid
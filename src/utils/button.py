@@ -1,4 +1,5 @@
-from src.libs.fltk import rectangle, texte, taille_texte, image
+from src.libs.fltk import rectangle, texte, image
+from src.utils.text import fit
 
 
 __all__ = [
@@ -14,10 +15,12 @@ class Button:
         self.width = width
         self.height = height
         self.ax, self.bx, self.ay, self.by = x - (width // 2), x + (width // 2), y - (height // 2), y + (height // 2)
-        self.hitbox = {(w, h) for w in range(self.ax, self.bx + 1) for h in range(self.ay, self.by + 1)}
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.ax <= x <= self.bx and self.ay <= y <= self.by
 
     def click(self, x: int, y: int):
-        if (x, y) in self.hitbox:
+        if self.contains(x, y):
             self.on_click()
             return True
         return False
@@ -39,16 +42,7 @@ class TextButton(Button):
         self.text = text
         self.color = color
         self.font_name = font_name
-        self.font_size = 0
-
-        lines = text.split('\n')
-        while self.font_size < min(width, height):
-            w, h = max([taille_texte(line, font_name, self.font_size) for line in lines])
-            if w < width and h * len(lines) < height:
-                self.font_size += 1
-            else:
-                self.font_size -= 1
-                break
+        self.font_size = fit(text, width, height, font_name)
 
     def draw(self):
         rectangle(self.ax, self.ay, self.bx, self.by, '#000000', self.color, 5)
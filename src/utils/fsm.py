@@ -1,4 +1,6 @@
-from src.libs.fltk import efface_tout, FltkEvent, type_ev
+from src.libs.fltk import efface_tout, arrete_boucle, FltkEvent, type_ev, abscisse, ordonnee
+from src.utils.hitgrid import HitGrid
+from src.profiler import span
 from typing import Optional
 
 
@@ -14,15 +16,31 @@ class State:
     current: Optional['State'] = None
     proxy: Storage = Storage()
 
+    def __init__(self):
+        # Buttons receiving the clicks of the state
+        self.widgets = HitGrid()
+
     @classmethod
     def change_state(cls, state: Optional['State'] = None):
-        if cls.current is not None:
-            cls.current.on_exit()
-        cls.current = state
-        if cls.current is not None:
-            cls.current.on_enter()
+        with span('change_state'):
+            if cls.current is not None:
+                cls.current.on_exit()
+            cls.current = state
+            if cls.current is not None:
+                cls.current.on_enter()
         return cls.current
 
+    @classmethod
+    def dispatch(cls, ev: FltkEvent):
+        """
+        Forwards the event to the current state, and stops the event loop once there is none left
+        """
+        if cls.current is not None:
+            with span(f'on_event {type_ev(ev)}'):
+                cls.current.on_event(ev)
+        if cls.current is None:
+            arrete_boucle()
+
     def on_enter(self):
         """
         Code to be executed on state enter
@@ -35,6 +53,10 @@ class State:
         if type_ev(ev) == 'Quitte':
             State.change_state(None)
             return
+        if type_ev(ev) in ('ClicGauche', 'ClicDroit'):
+            button = self.widgets.at(abscisse(ev), ordonnee(ev))
+            if button is not None:
+                button.on_click()
 
     def on_exit(self):
         """
@@ -0,0 +1,42 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.utils.button import Button
+
+
+class HitGrid:
+    """
+    Spatial index of buttons: each button is listed in the cells of a coarse grid it overlaps,
+    so a click only tests the few buttons of its cell
+    """
+
+    def __init__(self, cell: int = 64):
+        self.cell = cell
+        self.buckets: Dict[Tuple[int, int], List['Button']] = {}
+
+    def _cells(self, button: 'Button'):
+        for cx in range(button.ax // self.cell, button.bx // self.cell + 1):
+            for cy in range(button.ay // self.cell, button.by // self.cell + 1):
+                yield cx, cy
+
+    def add(self, button: 'Button') -> 'Button':
+        for key in self._cells(button):
+            self.buckets.setdefault(key, []).append(button)
+        return button
+
+    def remove(self, button: 'Button') -> None:
+        for key in self._cells(button):
+            bucket = self.buckets.get(key, [])
+            if button in bucket:
+                bucket.remove(button)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+
+    def at(self, x: int, y: int) -> Optional['Button']:
+        """
+        Returns the button under the given point, the last added one if they overlap
+        """
+        for button in reversed(self.buckets.get((x // self.cell, y // self.cell), ())):
+            if button.contains(x, y):
+                return button
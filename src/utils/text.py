@@ -0,0 +1,45 @@
+from functools import lru_cache
+from typing import Tuple
+
+from src.libs.fltk import taille_texte, a_la_fermeture
+
+
+__all__ = [
+    'measure',
+    'fit'
+]
+
+
+@lru_cache(maxsize=4096)
+def measure(line: str, font_name: str, font_size: int) -> Tuple[int, int]:
+    """
+    Returns the width and the height of the line in pixels, measured once per font and string
+    """
+    return taille_texte(line, font_name, font_size)
+
+
+@lru_cache(maxsize=1024)
+def fit(text: str, width: int, height: int, font_name: str) -> int:
+    """
+    Returns the largest font size below min(width, height), at which the text fits strictly in the box
+    """
+    lines = text.split('\n')
+
+    def fits(size: int) -> bool:
+        w, h = max([measure(line, font_name, size) for line in lines])
+        return w < width and h * len(lines) < height
+
+    # Binary search of the first size the text does not fit at
+    low, high = 0, min(width, height)
+    while low < high:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle + 1
+        else:
+            high = middle
+    return low if low == min(width, height) else low - 1
+
+
+# Sizes are measured with the fonts of the window: a new window measures them again
+a_la_fermeture(measure.cache_clear)
+a_la_fermeture(fit.cache_clear)
@@ -0,0 +1,192 @@
+import glob
+import sys
+from typing import Optional, Tuple, Union
+
+from src.binmap import load
+from src.engine import Dungeon, Entity
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+__all__ = [
+    'NUMPY_AVAILABLE',
+    'array',
+    'adjacency',
+    'components',
+    'distances',
+    'target',
+    'verify'
+]
+
+
+# Below this number of rooms in the frontier, a step of distances() is done in Python
+SMALL_FRONTIER = 64
+
+
+def array(dungeon: Dungeon) -> 'np.ndarray':
+    """
+    Returns the door masks of the dungeon as a (height, width) array, sharing the memory of the grid
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError('the vectorized engine needs NumPy')
+    return np.frombuffer(dungeon.grid, dtype=np.uint8).reshape(dungeon.height, dungeon.width)
+
+
+def adjacency(grid: 'np.ndarray') -> 'np.ndarray':
+    """
+    Returns the links of a (height, width) array of door masks: the doors opened on both sides
+    """
+    links = np.zeros_like(grid, dtype=np.uint8)
+    # 1 where the top door of a room faces the bottom door of the room above
+    vertical = grid[1:] & 1 & grid[:-1] >> 2
+    links[1:] |= vertical
+    links[:-1] |= vertical << 2
+    # 1 where the right door of a room faces the left door of the room on its right
+    horizontal = grid[:, :-1] >> 1 & 1 & grid[:, 1:] >> 3
+    links[:, :-1] |= horizontal << 1
+    links[:, 1:] |= horizontal << 3
+    return links
+
+
+def components(links: 'np.ndarray') -> 'np.ndarray':
+    """
+    Returns the label of the connected area of every room: the smallest index of a room in it
+    """
+    flat = links.ravel()
+    width = links.shape[1]
+    down = np.flatnonzero(flat & 4)
+    right = np.flatnonzero(flat & 2)
+    u = np.concatenate((down, right))
+    v = np.concatenate((down + width, right + 1))
+
+    # Hook and compress: the root of each side of a link is hooked under the smallest of both
+    # roots, then every room is pointed straight to its root, until no link joins two trees
+    parent = np.arange(flat.size)
+    while True:
+        ru, rv = parent[u], parent[v]
+        split = ru != rv
+        if not split.any():
+            break
+        # Links within a single tree stay so
+        u, v, ru, rv = u[split], v[split], ru[split], rv[split]
+        np.minimum.at(parent, np.maximum(ru, rv), np.minimum(ru, rv))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+    return parent.reshape(links.shape)
+
+
+def distances(links: 'np.ndarray', start: Union[int, 'np.ndarray']) -> 'np.ndarray':
+    """
+    Returns the number of moves from the start rooms, given by flat indices, to every room, -1 where unreachable
+    """
+    flat = np.ascontiguousarray(links).ravel()
+    width = links.shape[1]
+    dist = np.full(flat.size, -1, dtype=np.int64)
+    dist[np.atleast_1d(start)] = 0
+    frontier = np.flatnonzero(dist == 0)
+    # Python views of the arrays, which index much faster than the arrays for single rooms
+    masks, seen = memoryview(flat), memoryview(dist)
+    # Scratch array: each reached room keeps the position of one of its copies in the frontier
+    claims = None
+
+    # The frontier only holds the rooms reached last, so each step costs its size, not the board one.
+    # A small frontier, as in the corridors of a maze, is cheaper to walk in Python than to vectorize
+    step = 0
+    while len(frontier):
+        step += 1
+        if len(frontier) < SMALL_FRONTIER:
+            reached = []
+            for index in (frontier if isinstance(frontier, list) else frontier.tolist()):
+                mask = masks[index]
+                if mask & 1 and seen[index - width] < 0:
+                    seen[index - width] = step
+                    reached.append(index - width)
+                if mask & 2 and seen[index + 1] < 0:
+                    seen[index + 1] = step
+                    reached.append(index + 1)
+                if mask & 4 and seen[index + width] < 0:
+                    seen[index + width] = step
+                    reached.append(index + width)
+                if mask & 8 and seen[index - 1] < 0:
+                    seen[index - 1] = step
+                    reached.append(index - 1)
+            frontier = reached
+            continue
+
+        frontier = np.asarray(frontier)
+        doors = flat[frontier]
+        reached = np.concatenate((
+            frontier[doors & 1 != 0] - width,
+            frontier[doors & 2 != 0] + 1,
+            frontier[doors & 4 != 0] + width,
+            frontier[doors & 8 != 0] - 1,
+        ))
+        reached = reached[dist[reached] < 0]
+        # A room reached from several sides is kept once: the copy whose position was written last
+        if claims is None:
+            claims = np.empty(flat.size, dtype=np.int64)
+        order = np.arange(reached.size)
+        claims[reached] = order
+        frontier = reached[claims[reached] == order]
+        dist[frontier] = step
+
+    return dist.reshape(links.shape)
+
+
+def target(dungeon: Dungeon, dist: 'np.ndarray') -> Optional[Tuple[Entity, int]]:
+    """
+    Returns the target the knight goes to and its distance, given the distances from the knight.
+    As in Dungeon.bfs, the highest priority wins, then the farthest target
+    """
+    flat = dist.ravel()
+    best = None
+    for entity in dungeon.entities:
+        if entity.symbol != 'A' and entity.alive:
+            distance = int(flat[entity.y * dungeon.width + entity.x])
+            if distance >= 0 and (best is None or (entity.priority, distance) >= (best[0].priority, best[1])):
+                best = (entity, distance)
+    return best
+
+
+def verify(dungeon: Dungeon) -> bool:
+    """
+    Returns True, if the vectorized engine agrees with Dungeon: same links, and the path of Dungeon.bfs
+    goes to a target of the same priority, along rooms one move farther each
+    """
+    grid = array(dungeon)
+    links = adjacency(grid)
+    if links.tobytes() != bytes(dungeon.links):
+        return False
+
+    player = dungeon.player
+    start = player.y * dungeon.width + player.x
+    dist = distances(links, start)
+    labels = components(links)
+    if not np.array_equal(dist >= 0, labels == labels.flat[start]):
+        return False
+
+    path = dungeon.bfs()
+    best = target(dungeon, dist)
+    if path is None or best is None:
+        return path is None and best is None
+
+    end = path[-1]
+    chosen = max((ent for ent in dungeon.entities if ent.symbol != 'A' and ent.alive and ent.room == end),
+                 key=lambda ent: ent.priority)
+    return (chosen.priority == best[0].priority and len(path) - 1 == best[1]
+            and [int(dist[room.y, room.x]) for room in path] == list(range(len(path))))
+
+
+if __name__ == '__main__':
+    for filename in sys.argv[1:] or sorted(glob.glob('assets/maps/*')):
+        print(f'{filename}: {"ok" if verify(load(filename)) else "MISMATCH"}')
@@ -0,0 +1,55 @@
+import pytest
+
+from src.binmap import ENTITY, HEADER, MAGIC, convert, load, load_binary, save_binary
+from src.engine import Dungeon, MapError
+
+
+TEXT = '╔═╗\n╠╬╣\n╚═╝\nA 0 0\nD 1 1 1\nD 2 2 2\nT 2 0 1\n'
+
+
+def test_round_trip(tmp_path):
+    (tmp_path / 'map.txt').write_text(TEXT, encoding='utf-8')
+    convert(str(tmp_path / 'map.txt'), str(tmp_path / 'map.wiy'))
+    convert(str(tmp_path / 'map.wiy'), str(tmp_path / 'copy.txt'))
+
+    text, binary = Dungeon.from_file(str(tmp_path / 'map.txt')), load(str(tmp_path / 'map.wiy'))
+    assert bytes(binary.grid) == bytes(text.grid)
+    assert bytes(binary.links) == bytes(text.links)
+    assert [ent.state for ent in binary.entities] == [ent.state for ent in text.entities]
+    assert binary.state_hash == text.state_hash
+    assert (tmp_path / 'copy.txt').read_text(encoding='utf-8') == (tmp_path / 'map.txt').read_text(encoding='utf-8')
+
+
+def test_rotation_does_not_write(tmp_path):
+    filename = str(tmp_path / 'map.wiy')
+    save_binary(Dungeon.from_file('assets/maps/map1.txt'), filename)
+    with open(filename, 'rb') as f:
+        before = f.read()
+    dungeon = load_binary(filename)
+    dungeon.room(0, 0).rotate_right()
+    with open(filename, 'rb') as f:
+        assert f.read() == before
+
+
+def binary(entities, rooms=(15, 15), width=2, height=1):
+    return (HEADER.pack(MAGIC, width, height, len(entities))
+            + b''.join(ENTITY.pack(*entity) for entity in entities) + bytes(rooms))
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'', 'empty file'),
+    (b'WIY1' + bytes(20), 'not a binary map'),
+    (binary([(b'A', 0, 0, 1)]) + bytes(2), 'expected 31 bytes for 2x1 rooms, got 33'),
+    (binary([(b'A', 0, 0, 1)])[:-1], 'expected 31 bytes for 2x1 rooms, got 30'),
+    (binary([(b'A', 0, 0, 1)], rooms=(15, 0)), 'invalid room'),
+    (binary([(b'A', 0, 0, 1), (b'Z', 1, 0, 1)]), "unknown entity 'Z'"),
+    (binary([(b'A', 0, 0, 1), (b'D', 2, 0, 1)]), 'entity at (2, 0) is out of the dungeon'),
+    (binary([(b'D', 1, 0, 1)]), 'expected exactly one knight'),
+    (binary([(b'A', 0, 0, 1), (b'D', 0, 0, 1)]), 'entity at (0, 0) is in the room of the knight'),
+])
+def test_corrupt(tmp_path, data, message):
+    filename = tmp_path / 'map.wiy'
+    filename.write_bytes(data)
+    with pytest.raises(MapError) as error:
+        load_binary(str(filename))
+    assert str(error.value) == f'{filename}: {message}'
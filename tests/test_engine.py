@@ -0,0 +1,69 @@
+import io
+import random
+
+import pytest
+
+from benchmarks.maps import random_map
+from src.engine import Dungeon, MapError
+
+
+def parse(text):
+    return Dungeon.from_stream(io.StringIO(text), 'map.txt')
+
+
+def test_parse():
+    dungeon = parse('╔╗\n╚╝\n\nD 1 1 2\nA 0 0\n')
+    assert (dungeon.width, dungeon.height) == (2, 2)
+    assert bytes(dungeon.grid) == bytes((6, 12, 3, 9))
+    assert [(ent.symbol, ent.x, ent.y, ent.level) for ent in dungeon.entities] == [('A', 0, 0, 1), ('D', 1, 1, 2)]
+    assert dungeon.bfs() is not None
+
+
+@pytest.mark.parametrize('text, message', [
+    ('╔╗\n╚x\nA 0 0\n', "map.txt:2: unknown room 'x' at column 2"),
+    ('╔╗\n╚\nA 0 0\n', 'map.txt:2: row of 1 rooms, expected 2'),
+    ('╔╗\nZ 0 0\nA 0 0\n', "map.txt:2: unknown entity 'Z'"),
+    ('╔╗\nD 0\nA 0 0\n', 'map.txt:2: expected "D x y [level]", got \'D 0\''),
+    ('╔╗\nA 0 0\nD 1 one\n', "map.txt:3: coordinates and level must be integers, got 'D 1 one'"),
+    ('╔╗\nA 0 0\nD 2 0 1\n', 'map.txt:3: entity at (2, 0) is out of the dungeon'),
+    ('╔╗\nD 1 0 1\n', 'map.txt: expected exactly one knight'),
+    ('╔╗\nA 0 0\nA 1 0\n', 'map.txt: expected exactly one knight'),
+    ('╔╗\nA 1 0\nD 1 0 1\n', 'map.txt:3: entity at (1, 0) is in the room of the knight'),
+    ('\nA 0 0\n', 'map.txt: no rooms'),
+])
+def test_invalid(text, message):
+    with pytest.raises(MapError) as error:
+        parse(text)
+    assert str(error.value) == message
+
+
+def recomputed(dungeon):
+    other = dungeon.copy()
+    other._hash = None
+    return other.state_hash
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_state_hash(seed):
+    rnd = random.Random(seed)
+    dungeon = parse(random_map(7, 5, 3, seed))
+    dungeon.state_hash
+    for _ in range(200):
+        draw = rnd.random()
+        if draw < 0.4:
+            dungeon.room(rnd.randrange(7), rnd.randrange(5)).rotate_right()
+        elif draw < 0.6:
+            dungeon.room(rnd.randrange(7), rnd.randrange(5)).rotate_left()
+        elif dungeon.update_dungeon():
+            break
+        assert dungeon.state_hash == recomputed(dungeon)
+
+
+def test_state_hash_of_turned_room():
+    dungeon = parse(random_map(7, 5, 3, 0))
+    start = dungeon.state_hash
+    dungeon.room(2, 2).rotate_right()
+    assert dungeon.state_hash != start
+    for _ in range(3):
+        dungeon.room(2, 2).rotate_right()
+    assert dungeon.state_hash == start
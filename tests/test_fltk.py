@@ -0,0 +1,67 @@
+from src.libs import fltk as tk
+
+
+def render(draw):
+    commandes = []
+    tk.debut_trame(commandes)
+    try:
+        draw()
+    finally:
+        tk.fin_trame()
+    return commandes
+
+
+def test_hidden_rectangle_removed():
+    def draw():
+        tk.rectangle(5, 5, 15, 15, remplissage='red', tag='room')
+        tk.rectangle(0, 0, 20, 20, remplissage='blue', tag='room')
+        tk.rectangle(5, 5, 15, 15, remplissage='red', tag='other')
+
+    commandes = render(draw)
+    assert [commande[2:6] for commande in commandes] == [(0, 0, 20, 20), (5, 5, 15, 15)]
+    assert dict(zip(commandes[0][6::2], commandes[0][7::2]))['-fill'] == 'blue'
+
+
+def test_rectangle_kept_after_delete():
+    def draw():
+        tk.rectangle(5, 5, 15, 15, remplissage='red', tag='room')
+        tk.efface('path')
+        tk.rectangle(0, 0, 20, 20, remplissage='blue', tag='room')
+
+    assert len(render(draw)) == 3
+
+
+def test_rectangles_merged_without_outline():
+    def draw():
+        for x in range(0, 30, 10):
+            tk.rectangle(x, 0, x + 10, 10, remplissage='red', epaisseur=0)
+        tk.rectangle(0, 10, 30, 20, remplissage='red', epaisseur=0)
+
+    assert [commande[2:6] for commande in render(draw)] == [(0, 0, 30, 20)]
+
+
+def test_rectangles_with_outline_not_merged():
+    def draw():
+        tk.rectangle(0, 0, 10, 10, remplissage='red')
+        tk.rectangle(10, 0, 20, 10, remplissage='red')
+
+    assert len(render(draw)) == 2
+
+
+def test_rectangles_merged_from_any_corner():
+    def draw():
+        tk.rectangle(10, 0, 0, 5, remplissage='red', epaisseur=0)
+        tk.rectangle(20, 5, 10, 0, remplissage='red', epaisseur=0)
+
+    assert [commande[2:6] for commande in render(draw)] == [(0, 0, 20, 5)]
+
+
+def test_many_rectangles():
+    def draw():
+        for x in range(0, 790, 10):
+            for y in range(0, 490, 10):
+                tk.rectangle(x, y, x + 15, y + 15, remplissage='red')
+        tk.rectangle(0, 0, 800, 500, remplissage='blue')
+
+    commandes = render(draw)
+    assert [commande[2:6] for commande in commandes] == [(0, 0, 800, 500)]
@@ -0,0 +1,70 @@
+import io
+import random
+
+from benchmarks.maps import random_map
+from src.engine import Dungeon
+from src.headless import TURN, RIGHT, LEFT, apply
+from src.history import History
+
+
+def recomputed(dungeon):
+    other = dungeon.copy()
+    other._hash = None
+    return other.state_hash
+
+
+def test_snapshot_restore():
+    dungeon = Dungeon.from_stream(io.StringIO(random_map(7, 5, 3, 1)))
+    snapshot = dungeon.snapshot()
+    start = dungeon.state_hash
+    rnd = random.Random(1)
+    for _ in range(50):
+        dungeon.room(rnd.randrange(7), rnd.randrange(5)).rotate_right()
+        dungeon.update_dungeon()
+
+    dungeon.restore(snapshot)
+    fresh = Dungeon.from_stream(io.StringIO(random_map(7, 5, 3, 1)))
+    assert dungeon.snapshot() == snapshot
+    assert bytes(dungeon.links) == bytes(fresh.links)
+    assert dungeon.state_hash == start == recomputed(dungeon)
+    assert [(room.x, room.y) for room in dungeon.path() or ()] == [(room.x, room.y) for room in fresh.bfs() or ()]
+
+
+def test_undo():
+    rnd = random.Random(2)
+    dungeon = Dungeon.from_stream(io.StringIO(random_map(8, 8, 4, 2)))
+    history = History(dungeon)
+    snapshots = [dungeon.snapshot()]
+    for _ in range(2000):
+        draw = rnd.random()
+        if draw < 0.3:
+            if history.undo():
+                snapshots.pop()
+            assert dungeon.snapshot() == snapshots[-1]
+        else:
+            action = (TURN,) if draw < 0.35 else (RIGHT if draw < 0.7 else LEFT, rnd.randrange(8), rnd.randrange(8))
+            history.record(action)
+            if apply(dungeon, action):
+                break
+            snapshots.append(dungeon.snapshot())
+        assert dungeon.state_hash == recomputed(dungeon)
+
+    while history.undo():
+        snapshots.pop()
+    assert dungeon.snapshot() == snapshots[0]
+
+
+def test_undo_limit():
+    dungeon = Dungeon.from_stream(io.StringIO(random_map(4, 4, 2, 3)))
+    history = History(dungeon, limit=3)
+    masks = []
+    for _ in range(5):
+        masks.append(dungeon.grid[0])
+        history.record((RIGHT, 0, 0))
+        apply(dungeon, (RIGHT, 0, 0))
+    # Only the last three rotations can be undone
+    assert len(history) == 3
+    for _ in range(3):
+        assert history.undo()
+    assert not history.undo()
+    assert dungeon.grid[0] == masks[2]
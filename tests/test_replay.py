@@ -0,0 +1,35 @@
+from benchmarks.maps import write_map
+from src.engine import Dungeon
+from src.headless import TURN
+from src.replay import Recorder, Replay
+
+
+def test_seek_twice(tmp_path):
+    # Two dragons of the same priority: the knight walks towards one, but goes back to the other
+    # once it has moved, so that replaying from a copy must not reuse a stale path
+    map_path = str(tmp_path / 'map.txt')
+    write_map(map_path, 8, 8, 4, 673)
+    filename = str(tmp_path / 'game.wiyr')
+    recorder = Recorder(filename, map_path)
+    for _ in range(3):
+        recorder.record((TURN,), 8)
+    recorder.close()
+
+    replay = Replay(filename, every=1)
+    states = [[entity.state for entity in replay.seek(2).entities] for _ in range(3)]
+    assert states[0] == states[1] == states[2]
+
+    dungeon = Dungeon.from_file(map_path)
+    for _ in range(2):
+        dungeon.update_dungeon()
+    assert states[0] == [entity.state for entity in dungeon.entities]
+
+
+def test_copy_keeps_path(tmp_path):
+    map_path = str(tmp_path / 'map.txt')
+    write_map(map_path, 8, 8, 4, 673)
+    dungeon = Dungeon.from_file(map_path)
+    path = dungeon.path()
+    other = dungeon.copy()
+    assert [(room.x, room.y) for room in other.path()] == [(room.x, room.y) for room in path]
+    assert all(room.dungeon is other for room in other.path())